@@ -0,0 +1,96 @@
+"""Асинхронные представления для чтения рецептов, тэгов и ингредиентов.
+
+При работе под ASGI синхронное представление занимает поток на всё
+время запроса, в том числе пока ждёт базу данных. Представления
+этого модуля обрабатывают GET-запросы в формате JSON асинхронными
+методами ViewSet (`alist`, `aretrieve` из `api.mixins.AsyncReadMixin`),
+а остальные запросы (запись, HEAD, Browsable API) передают
+синхронному ViewSet. Ответы совпадают с ответами синхронных
+представлений, включая ETag.
+
+Подключаются в `api.urls` при `ASYNC_READ_VIEWS = True` в настройках.
+"""
+from asgiref.sync import sync_to_async
+
+from rest_framework.exceptions import APIException
+
+# HTTP-методы, обрабатываемые асинхронно
+ASYNC_METHODS = ('get',)
+
+
+async def aauthenticate(request):
+    """Асинхронно аутентифицирует запрос DRF.
+
+    Аутентификаторы без `aauthenticate` вызываются в потоке.
+
+    Args:
+        request (Request): Запрос DRF.
+
+    Raises:
+        AuthenticationFailed: Неверные учётные данные.
+    """
+    for authenticator in request.authenticators:
+        authenticate = getattr(authenticator, 'aauthenticate', None)
+        if authenticate is None:
+            authenticate = sync_to_async(authenticator.authenticate)
+        try:
+            user_auth_tuple = await authenticate(request)
+        except APIException:
+            request._not_authenticated()
+            raise
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+    request._not_authenticated()
+
+
+def async_read_view(viewset, actions, async_actions, **initkwargs):
+    """Создаёт асинхронное представление для ViewSet.
+
+    Args:
+        viewset (type): Класс ViewSet с асинхронными методами.
+        actions (dict): HTTP-метод - действие синхронного ViewSet,
+            как в роутере: `{'get': 'list', 'post': 'create'}`.
+        async_actions (dict): HTTP-метод - асинхронный метод ViewSet:
+            `{'get': 'alist'}`.
+        initkwargs: Аргументы `as_view()`: `basename`, `detail`.
+
+    Returns:
+        coroutine function: Представление Django.
+
+    Example:
+        path('tags/', async_read_view(
+            TagViewSet, {'get': 'list'}, {'get': 'alist'},
+            basename='tags', detail=False,
+        ))
+    """
+    sync_view = viewset.as_view(actions, **initkwargs)
+
+    async def view(request, *args, **kwargs):
+        method = request.method.lower()
+        if method not in ASYNC_METHODS or method not in async_actions:
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        self = viewset(**initkwargs)
+        self.action_map = actions
+        self.args, self.kwargs = args, kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await aauthenticate(request)
+            self.initial(request, *args, **kwargs)
+            if request.accepted_renderer.format != 'json':
+                return await sync_to_async(sync_view)(
+                    request._request, *args, **kwargs
+                )
+            handler = getattr(self, async_actions[method])
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(request, response, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
@@ -0,0 +1,281 @@
+"""Аутентификация по токену с кэшированием пользователя.
+
+`TokenAuthentication` на каждый запрос выполняет
+`SELECT ... FROM authtoken_token JOIN users_user`.
+`CachedTokenAuthentication` хранит данные найденных токенов
+в памяти процесса (LRU, `conf.AUTH_TOKEN_LRU_SIZE` записей,
+`conf.AUTH_TOKEN_LOCAL_TIMEOUT` секунд) и в общем кэше Django
+(`conf.AUTH_TOKEN_CACHE_TIMEOUT` секунд), поэтому запрос к базе
+выполняется только для токена, которого нет ни там, ни там.
+В кэше хранятся только токен, id пользователя и `is_active`:
+хэш пароля и права в кэш не попадают, остальные поля
+пользователя загружаются из базы при первом обращении.
+
+Записи удаляются при выходе (удаление токена, `user_logged_out`)
+и любом сохранении пользователя - смене пароля, деактивации и т.д.
+Обработчики сигналов находятся в `api.signals`. В других процессах
+запись в памяти живёт не дольше `conf.AUTH_TOKEN_LOCAL_TIMEOUT`.
+Кэш в памяти процесса (`LocMemCache`) не удаляется в других
+процессах, поэтому общий кэш используется, только если
+`api.cache.cache_shared()`.
+"""
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.authentication import (TokenAuthentication,
+                                           get_authorization_header)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.models import User
+
+from . import conf
+from .cache import cache_shared
+
+AUTH_TOKEN_KEY = 'auth-token:{}'
+
+
+class LocalTokenCache:
+    """Ограниченный по размеру LRU кэш данных токенов в памяти процесса.
+
+    Attributes:
+        maxsize (int): Максимальное количество записей.
+        timeout (int): Время жизни записи, секунды.
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.items = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        """Возвращает данные токена или None, если запись устарела."""
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            token, expires = item
+            if expires < monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        """Сохраняет данные токена, вытесняя самые давние записи."""
+        with self.lock:
+            self.items[key] = (token, monotonic() + self.timeout)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        """Удаляет запись."""
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        """Удаляет все записи."""
+        with self.lock:
+            self.items.clear()
+
+
+local_tokens = LocalTokenCache(
+    conf.AUTH_TOKEN_LRU_SIZE, conf.AUTH_TOKEN_LOCAL_TIMEOUT
+)
+
+
+def token_cache_key(key):
+    """Ключ записи токена. Сам токен в ключ не попадает.
+
+    Args:
+        key (str): Значение токена.
+
+    Returns:
+        str: Ключ кэша.
+    """
+    return AUTH_TOKEN_KEY.format(sha256(key.encode()).hexdigest())
+
+
+def forget_tokens(*keys):
+    """Удаляет токены из кэша в памяти и общего кэша.
+
+    Args:
+        keys (str): Значения токенов.
+    """
+    if not keys:
+        return
+    cache_keys = [token_cache_key(key) for key in keys]
+    for cache_key in cache_keys:
+        local_tokens.delete(cache_key)
+    cache.delete_many(cache_keys)
+
+
+def forget_user_tokens(user_id):
+    """Удаляет из кэша токены пользователя.
+
+    Args:
+        user_id (int): id пользователя.
+    """
+    forget_tokens(*Token.objects.filter(user_id=user_id).values_list(
+        'key', flat=True
+    ))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """`TokenAuthentication`, кэширующий данные токена.
+
+    Для каждого запроса по данным из кэша создаются новые объекты
+    токена и пользователя. Для асинхронных представлений есть
+    `aauthenticate`: заголовок разбирает тот же `parse_key`,
+    а пользователя создаёт тот же `get_credentials`, отличаются
+    только обращения к кэшу и базе.
+    """
+
+    def authenticate(self, request):
+        key = self.parse_key(request)
+        if key is None:
+            return None
+        return self.authenticate_credentials(key)
+
+    async def aauthenticate(self, request):
+        """Асинхронный вариант `authenticate`.
+
+        Args:
+            request (Request): Текущий запрос.
+
+        Raises:
+            AuthenticationFailed: Неверный заголовок или токен.
+
+        Returns:
+            tuple | None: Пользователь и токен или None без заголовка.
+        """
+        key = self.parse_key(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    def parse_key(self, request):
+        """Получает значение токена из заголовка `Authorization`.
+
+        Args:
+            request (Request): Текущий запрос.
+
+        Raises:
+            AuthenticationFailed: Неверный заголовок.
+
+        Returns:
+            str | None: Токен или None, если заголовка с `keyword` нет.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise AuthenticationFailed(
+                _('Invalid token header. No credentials provided.')
+            )
+        if len(auth) > 2:
+            raise AuthenticationFailed(_(
+                'Invalid token header. '
+                'Token string should not contain spaces.'
+            ))
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(_(
+                'Invalid token header. '
+                'Token string should not contain invalid characters.'
+            ))
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        data = local_tokens.get(cache_key)
+        if data is None:
+            shared = cache_shared()
+            data = cache.get(cache_key) if shared else None
+            if data is None:
+                data = self.get_token_data(key)
+                if shared:
+                    cache.set(
+                        cache_key, data,
+                        timeout=conf.AUTH_TOKEN_CACHE_TIMEOUT,
+                    )
+            local_tokens.set(cache_key, data)
+        return self.get_credentials(data)
+
+    async def aauthenticate_credentials(self, key):
+        """Асинхронный вариант `authenticate_credentials`."""
+        cache_key = token_cache_key(key)
+        data = local_tokens.get(cache_key)
+        if data is None:
+            shared = cache_shared()
+            data = await cache.aget(cache_key) if shared else None
+            if data is None:
+                data = await self.aget_token_data(key)
+                if shared:
+                    await cache.aset(
+                        cache_key, data,
+                        timeout=conf.AUTH_TOKEN_CACHE_TIMEOUT,
+                    )
+            local_tokens.set(cache_key, data)
+        return self.get_credentials(data)
+
+    def get_token_queryset(self, key):
+        """Запрос данных токена: без полей пользователя, кроме `is_active`."""
+        return self.get_model().objects.filter(key=key).values_list(
+            'key', 'user_id', 'user__is_active'
+        )
+
+    def get_token_data(self, key):
+        """Загружает данные токена из базы данных.
+
+        Args:
+            key (str): Значение токена.
+
+        Raises:
+            AuthenticationFailed: Токен не найден.
+
+        Returns:
+            tuple: Токен, id пользователя и `is_active`.
+        """
+        data = self.get_token_queryset(key).first()
+        if data is None:
+            raise AuthenticationFailed(_('Invalid token.'))
+        return data
+
+    async def aget_token_data(self, key):
+        """Асинхронный вариант `get_token_data`."""
+        data = await self.get_token_queryset(key).afirst()
+        if data is None:
+            raise AuthenticationFailed(_('Invalid token.'))
+        return data
+
+    def get_credentials(self, data):
+        """Проверяет пользователя и создаёт объекты токена и пользователя.
+
+        У пользователя загружены только `id` и `is_active`, остальные
+        поля загружаются из базы при обращении к ним.
+
+        Args:
+            data (tuple): Токен, id пользователя и `is_active`.
+
+        Raises:
+            AuthenticationFailed: Пользователь деактивирован.
+
+        Returns:
+            tuple: Пользователь и токен.
+        """
+        key, user_id, is_active = data
+        if not is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        user = User.from_db(
+            DEFAULT_DB_ALIAS, ('id', 'is_active'), (user_id, is_active)
+        )
+        return user, self.get_model()(key=key, user=user)
@@ -0,0 +1,259 @@
+"""Модуль кэширования представлений рецептов.
+
+В кэше хранится не зависящая от пользователя часть ответа
+`RecipeSerializer`: тэги, автор, ингредиенты, название, изображение,
+описание и время приготовления. Флаги текущего пользователя
+(`is_favorited`, `is_in_shopping_cart`, `author.is_subscribed`)
+добавляются к закэшированным данным при каждом запросе.
+
+Ключ записи - id рецепта, версия - общий номер версии рецептов.
+Изменение одного рецепта удаляет его запись, изменение данных,
+общих для многих рецептов (тэги, ингредиенты), увеличивает версию.
+
+Кэш должен быть общим для всех процессов: иначе изменение, сделанное
+в одном процессе (или командой `manage.py`), не сбросит записи
+в других. С кэшем в памяти процесса (`LocMemCache`) представления
+рецептов не кэшируются, если не задан `CACHE_SINGLE_PROCESS`
+(см. `cache_shared`).
+
+Также здесь хранятся отметки времени изменения списков пользователя
+(избранное, покупки, подписки) и счётчиков популярности рецептов,
+используемые в ETag ответов,
+и версии справочников (ингредиенты, тэги), по которым процессы
+перестраивают свои данные в памяти.
+"""
+from gzip import compress
+from hashlib import md5
+from threading import Lock
+from time import monotonic, time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.http import quote_etag
+
+from . import conf
+
+RECIPE_KEY = 'recipe:{}'
+RECIPES_VERSION_KEY = 'recipe:version'
+USER_LISTS_KEY = 'user-lists:{}'
+POPULARITY_KEY = 'recipe:popularity'
+CATALOG_VERSION_KEY = 'catalog:{}:version'
+
+
+def cache_shared():
+    """Видят ли все процессы одни и те же данные кэша.
+
+    `LocMemCache` считается общим только при `CACHE_SINGLE_PROCESS`
+    (тесты, `runserver`), `DummyCache` ничего не хранит.
+
+    Returns:
+        bool: True, если кэшу можно доверять отметки и версии.
+    """
+    backend = caches['default']
+    if isinstance(backend, DummyCache):
+        return False
+    return (
+        settings.CACHE_SINGLE_PROCESS
+        or not isinstance(backend, LocMemCache)
+    )
+
+
+def recipes_version():
+    """Текущая версия записей рецептов в кэше.
+
+    Returns:
+        int: Номер версии.
+    """
+    version = cache.get(RECIPES_VERSION_KEY)
+    if version is None:
+        cache.add(RECIPES_VERSION_KEY, 1, timeout=None)
+        version = cache.get(RECIPES_VERSION_KEY, 1)
+    return version
+
+
+def get_recipes(ids, version):
+    """Получает закэшированные представления рецептов.
+
+    Args:
+        ids (Iterable[int]): id рецептов.
+        version (int): Версия записей из `recipes_version()`.
+
+    Returns:
+        dict: Найденные представления по id рецепта. Пустой,
+        если кэш не общий.
+    """
+    if not cache_shared():
+        return {}
+    keys = {RECIPE_KEY.format(pk): pk for pk in ids}
+    found = cache.get_many(keys, version=version)
+    return {keys[key]: value for key, value in found.items()}
+
+
+def set_recipes(representations, version):
+    """Сохраняет представления рецептов в кэш.
+
+    Args:
+        representations (dict): Представления по id рецепта.
+        version (int): Версия записей из `recipes_version()`.
+    """
+    if not cache_shared():
+        return
+    cache.set_many(
+        {RECIPE_KEY.format(pk): data for pk, data in representations.items()},
+        timeout=conf.RECIPE_CACHE_TIMEOUT,
+        version=version,
+    )
+
+
+def invalidate_recipes(*ids):
+    """Удаляет из кэша представления переданных рецептов.
+
+    Args:
+        ids (int): id рецептов.
+    """
+    if ids:
+        cache.delete_many(
+            [RECIPE_KEY.format(pk) for pk in ids], version=recipes_version()
+        )
+
+
+def invalidate_all_recipes():
+    """Делает недействительными представления всех рецептов.
+
+    Старые записи не удаляются, а перестают читаться
+    и вытесняются бэкендом кэша по истечении `RECIPE_CACHE_TIMEOUT`.
+    """
+    try:
+        cache.incr(RECIPES_VERSION_KEY)
+    except ValueError:
+        cache.set(RECIPES_VERSION_KEY, 2, timeout=None)
+
+
+def user_lists_stamp(user_id):
+    """Время последнего изменения списков пользователя.
+
+    Args:
+        user_id (int): id пользователя.
+
+    Returns:
+        float: Unix-время изменения или 0, если отметки нет.
+    """
+    return cache.get(USER_LISTS_KEY.format(user_id), 0)
+
+
+def touch_user_lists(*user_ids):
+    """Обновляет время изменения списков пользователей.
+
+    Args:
+        user_ids (int): id пользователей.
+    """
+    if user_ids:
+        now = time()
+        cache.set_many(
+            {USER_LISTS_KEY.format(pk): now for pk in user_ids},
+            timeout=None,
+        )
+
+
+def popularity_stamp():
+    """Время последнего изменения счётчиков популярности рецептов.
+
+    Returns:
+        float: Unix-время изменения или 0, если отметки нет.
+    """
+    return cache.get(POPULARITY_KEY, 0)
+
+
+def touch_popularity():
+    """Обновляет время изменения счётчиков популярности рецептов."""
+    cache.set(POPULARITY_KEY, time(), timeout=None)
+
+
+def catalog_version(catalog):
+    """Текущая версия справочника.
+
+    Args:
+        catalog (str): Название справочника, например `ingredients`.
+
+    Returns:
+        int: Номер версии.
+    """
+    key = CATALOG_VERSION_KEY.format(catalog)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def local_catalog_version(catalog):
+    """Версия справочника для данных в памяти процесса.
+
+    К общей версии добавляется номер интервала
+    `conf.CATALOG_LOCAL_TIMEOUT`. С `LocMemCache` версия у каждого
+    процесса своя и изменения, сделанные другим процессом, не видны -
+    тогда данные в памяти перестраиваются в начале следующего интервала.
+
+    Args:
+        catalog (str): Название справочника, например `ingredients`.
+
+    Returns:
+        tuple: Версия для сравнения с версией построенных данных.
+    """
+    return (
+        catalog_version(catalog),
+        int(monotonic() // conf.CATALOG_LOCAL_TIMEOUT),
+    )
+
+
+def invalidate_catalog(catalog):
+    """Увеличивает версию справочника.
+
+    Args:
+        catalog (str): Название справочника, например `ingredients`.
+    """
+    try:
+        cache.incr(CATALOG_VERSION_KEY.format(catalog))
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY.format(catalog), 2, timeout=None)
+
+
+class RenderedCatalog:
+    """Готовый ответ со всем справочником в памяти процесса.
+
+    Хранит тело ответа в байтах, его сжатую gzip версию и строгий ETag.
+    Ответ строится заново функцией `render` при изменении версии
+    справочника (`local_catalog_version`).
+
+    Attributes:
+        catalog (str): Название справочника.
+        render (callable): Функция без аргументов, возвращающая
+            тело ответа в байтах.
+    """
+
+    def __init__(self, catalog, render):
+        self.catalog = catalog
+        self.render = render
+        self.lock = Lock()
+        self.rendered = (None, None, None, None)
+
+    def get(self):
+        """Возвращает готовый ответ для текущей версии справочника.
+
+        Returns:
+            tuple: Тело ответа, тело в gzip и ETag.
+        """
+        version = local_catalog_version(self.catalog)
+        if self.rendered[0] != version:
+            with self.lock:
+                if self.rendered[0] != version:
+                    body = self.render()
+                    self.rendered = (
+                        version,
+                        body,
+                        compress(body, mtime=0),
+                        quote_etag(md5(body).hexdigest()),
+                    )
+        return self.rendered[1:]
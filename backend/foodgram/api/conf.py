@@ -21,6 +21,9 @@ ADD_METHODS = ('GET', 'POST',)
 # HTTP методы разрешённые для удаления объектов
 DEL_METHODS = ('DELETE',)
 
+# Максимальное количество id в одном запросе на добавление/удаление списком
+BATCH_MAX_IDS = 100
+
 # HTTP методы для @action разрешающие вход
 # в функцию удаления и добавления объетов
 ACTION_METHODS = [s.lower() for s in (ADD_METHODS + DEL_METHODS)]
@@ -34,6 +37,20 @@ URL-параметры для активации фильтров.
 # Параметр для поиска ингридиентов по вхождению значения в название
 SEARCH_ING_NAME = 'name'
 
+# Параметр режима поиска ингредиентов.
+# Например нечёткий поиск с учётом опечаток: `mode=fuzzy`
+SEARCH_ING_MODE = 'mode'
+SEARCH_ING_FUZZY = 'fuzzy'
+
+# Параметр ограничения количества найденных ингредиентов
+SEARCH_ING_LIMIT = 'limit'
+
+# Количество ингредиентов при нечётком поиске, если `limit` не передан
+SEARCH_ING_FUZZY_LIMIT = 20
+
+# Максимальное количество найденных ингредиентов
+SEARCH_ING_MAX_LIMIT = 100
+
 # Параметр для поиска объектов в списке "избранное"
 FAVORITE = 'is_favorited'
 
@@ -46,6 +63,17 @@ AUTHOR = 'author'
 # Параметр для поиска объектов по тэгам
 TAGS = 'tags'
 
+# Параметр сортировки рецептов
+ORDERING = 'ordering'
+
+# Сортировка рецептов по популярности (количеству добавлений в избранное)
+# и поля этой сортировки, совпадающие с индексом `recipe_popular_idx`
+ORDERING_POPULAR = 'popular'
+ORDERING_POPULAR_FIELDS = ('-favorites_count', '-pub_date', '-id')
+
+# Параметр количества рецептов автора в списке подписок
+RECIPES_LIMIT = 'recipes_limit'
+
 # Поиск объектов только с переданным параметром.
 # Например только в избранном: `is_favorited=1`
 SYMBOL_TRUE_SEARCH = ('1', 'true',)
@@ -54,6 +82,57 @@ SYMBOL_TRUE_SEARCH = ('1', 'true',)
 # Например только не избранное: `is_favorited=0`
 SYMBOL_FALSE_SEARCH = ('0', 'false',)
 
+"""
+Настройки пагинации.
+"""
+# Параметр количества объектов на странице
+PAGE_LIMIT = 'limit'
+
+# Параметр включения постраничного вывода по курсору (без `COUNT(*)`).
+# Например первая страница: `cursor=`, следующие - `cursor=<значение>`
+CURSOR = 'cursor'
+
+# Количество объектов на странице курсора, если `limit` не передан
+CURSOR_DEFAULT_LIMIT = 6
+
+# Максимальное количество объектов на странице курсора
+CURSOR_MAX_LIMIT = 100
+
+"""
+Настройки кэширования.
+"""
+# Время хранения представления рецепта в кэше (секунды)
+RECIPE_CACHE_TIMEOUT = 60 * 60
+
+"""
+Кэш аутентификации по токену.
+"""
+# Количество токенов, хранимых в памяти процесса
+AUTH_TOKEN_LRU_SIZE = 1024
+
+# Время хранения токена в памяти процесса (секунды)
+AUTH_TOKEN_LOCAL_TIMEOUT = 30
+
+# Время хранения токена в общем кэше (секунды)
+AUTH_TOKEN_CACHE_TIMEOUT = 15 * 60
+
+# Наибольший возраст справочников в памяти процесса (секунды).
+# Используется, когда версии справочников не общие для процессов
+# (`LocMemCache`)
+CATALOG_LOCAL_TIMEOUT = 5 * 60
+
+"""
+Настройки файла со списком покупок.
+"""
+# TrueType-шрифт с кириллицей для списка покупок в PDF
+SHOP_LIST_PDF_FONT = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+
+# Размер PDF (байты), до которого он формируется в памяти, а не на диске
+SHOP_LIST_SPOOL_SIZE = 1024 * 1024
+
+# Размер частей (байты), которыми отдаётся PDF
+SHOP_LIST_CHUNK_SIZE = 64 * 1024
+
 """
 Литералы для выбора менеджера Мany-To-Many
 в эндпоинтах обеспечивающих работу с этими менеджерами.
@@ -65,6 +144,40 @@ FAVORITE_M2M = 'favorite'
 # Добавление рецепта в "список покупок". <user.carts>
 SHOP_CART_M2M = 'shopping_cart'
 
+"""Выгрузка рецептов в NDJSON."""
+# Количество рецептов, читаемых из базы данных за раз
+EXPORT_CHUNK_SIZE = 2000
+# Параметр запроса для сжатия выгрузки в gzip
+EXPORT_GZIP = 'gzip'
+
+"""Загрузка изображений в base64."""
+# Максимальный размер декодированного изображения, байт
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+# Максимальная сторона изображения, пикселей
+IMAGE_MAX_SIDE = 6000
+# Максимальное количество пикселей изображения
+IMAGE_MAX_PIXELS = 24_000_000
+# Допустимые форматы изображения (Pillow)
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+# Длина части строки base64, декодируемой за раз (кратна 4)
+IMAGE_DECODE_CHUNK = 64 * 1024
+
+"""Варианты изображений рецептов."""
+# Размеры вариантов (ширина, высота), в которые вписывается изображение
+IMAGE_VARIANTS = {
+    'thumb': (80, 80),
+    'card': (480, 480),
+    'detail': (1200, 1200),
+}
+# Форматы вариантов: расширение файла - формат Pillow
+IMAGE_VARIANT_FORMATS = {'jpeg': 'JPEG', 'webp': 'WEBP'}
+# Качество сжатия вариантов
+IMAGE_VARIANT_QUALITY = 85
+# Каталог для вариантов изображений в MEDIA_ROOT
+IMAGE_VARIANTS_DIR = 'recipe/images/variants/'
+# Количество потоков, обрабатывающих изображения
+IMAGE_WORKERS = 2
+
 """
 Настройки ограничений моделей.
 """
@@ -0,0 +1,96 @@
+"""Выгрузка всех рецептов в формате NDJSON.
+
+Каждая строка - JSON-объект рецепта с тэгами, ингредиентами, id автора
+и количеством добавлений в избранное и списки покупок.
+Рецепты читаются курсором на стороне сервера (`iterator(chunk_size)`),
+тэги и ингредиенты загружаются одним запросом на часть рецептов,
+поэтому расход памяти не зависит от размера таблицы.
+Используется командой `export_recipes` и `RecipeViewSet.export`.
+"""
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from recipes.models import AmountIngredient, Recipe
+
+from . import conf
+
+# Поля ингредиента рецепта в выгрузке
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit', 'amount')
+
+
+def export_recipes(chunk_size=conf.EXPORT_CHUNK_SIZE):
+    """Перебирает рецепты для выгрузки.
+
+    Args:
+        chunk_size (int): Количество рецептов, читаемых за раз.
+
+    Yields:
+        dict: Рецепт для выгрузки.
+    """
+    recipes = Recipe.objects.order_by('id').values(
+        'id', 'name', 'author', 'text', 'image', 'cooking_time',
+        'pub_date', 'updated_at', 'favorites_count', 'in_carts_count',
+    ).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(recipes, chunk_size))
+        if not chunk:
+            return
+        ids = [recipe['id'] for recipe in chunk]
+
+        tags = defaultdict(list)
+        for recipe_id, slug in Recipe.tags.through.objects.filter(
+            recipe_id__in=ids
+        ).values_list('recipe_id', 'tag__slug'):
+            tags[recipe_id].append(slug)
+
+        ingredients = defaultdict(list)
+        amounts = AmountIngredient.objects.filter(
+            recipe_id__in=ids
+        ).order_by().values_list(
+            'recipe_id', 'ingredients_id', 'ingredients__name',
+            'ingredients__measurement_unit', 'amount',
+        )
+        for recipe_id, *ingredient in amounts:
+            ingredients[recipe_id].append(
+                dict(zip(INGREDIENT_FIELDS, ingredient))
+            )
+
+        for recipe in chunk:
+            recipe['tags'] = tags[recipe['id']]
+            recipe['ingredients'] = ingredients[recipe['id']]
+            yield recipe
+
+
+def ndjson_lines(records):
+    """Кодирует записи в строки NDJSON.
+
+    Args:
+        records (Iterable[dict]): Записи.
+
+    Yields:
+        bytes: Строка JSON с переводом строки.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for record in records:
+        yield (encoder.encode(record) + '\n').encode()
+
+
+def gzip_stream(chunks):
+    """Сжимает поток байтов в формат gzip.
+
+    Args:
+        chunks (Iterable[bytes]): Исходные данные.
+
+    Yields:
+        bytes: Сжатые данные.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
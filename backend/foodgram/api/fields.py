@@ -1,20 +1,162 @@
-import base64
+import binascii
+from io import BytesIO
 
 import webcolors
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.uploadedfile import (InMemoryUploadedFile,
+                                            TemporaryUploadedFile)
+from PIL import Image, UnidentifiedImageError
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from . import conf
 
 
 class Base64ImageField(serializers.ImageField):
+    """Поле изображения, переданного строкой base64.
+
+    Принимает data URI (`data:image/png;base64,...`) или строку base64.
+    Строка декодируется частями во временный файл: в памяти, если размер
+    не больше `FILE_UPLOAD_MAX_MEMORY_SIZE`, иначе на диске. Пробелы
+    и переводы строк внутри base64 допускаются.
+    Заголовок изображения и его размеры в пикселях проверяются
+    по первым частям, слишком большие данные отклоняются
+    до декодирования. Окончательное имя файлу даёт хранилище.
+    """
+    default_error_messages = {
+        'too_large': (
+            'Размер изображения больше {max_size} байт.'
+        ),
+        'dimensions': (
+            'Размер изображения больше {max_side}x{max_side} '
+            'или {max_pixels} пикселей.'
+        ),
+        'format': 'Допустимые форматы изображения: {formats}.',
+        'base64': 'Изображение должно быть строкой base64.',
+    }
+
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+        if isinstance(data, str):
+            data = self.decode(data)
         return super().to_internal_value(data)
 
-    def to_representation(self, file):
-        return '/media/' + super().to_representation(file)
+    def decode(self, data):
+        """Декодирует строку base64 во временный файл.
+
+        Args:
+            data (str): data URI или строка base64.
+
+        Raises:
+            ValidationError: Некорректная строка base64.
+            ValidationError: Превышены ограничения размера.
+            ValidationError: Недопустимый формат изображения.
+
+        Returns:
+            UploadedFile: Файл с декодированным изображением.
+        """
+        # Начало base64 после заголовка data URI, без копирования строки
+        header = data.find(';base64,', 0, 100)
+        begin = header + len(';base64,') if header != -1 else 0
+        size = (len(data) - begin) // 4 * 3
+        if size > conf.IMAGE_MAX_SIZE:
+            self.fail('too_large', max_size=conf.IMAGE_MAX_SIZE)
+
+        if size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+            file = TemporaryUploadedFile('image', None, size, None)
+        else:
+            file = InMemoryUploadedFile(
+                BytesIO(), None, 'image', None, size, None
+            )
+
+        try:
+            checked = False
+            for chunk in self.chunks(data, begin):
+                try:
+                    file.write(binascii.a2b_base64(chunk))
+                except (binascii.Error, ValueError):
+                    self.fail('base64')
+                if not checked:
+                    checked = self.check_header(file, final=False)
+            if not checked:
+                self.check_header(file, final=True)
+        except ValidationError:
+            file.close()
+            raise
+
+        file.size = file.tell()
+        file.seek(0)
+        return file
+
+    def chunks(self, data, begin):
+        """Делит строку base64 на части для декодирования.
+
+        Пробелы и переводы строк (`base64.encodebytes`, MIME)
+        удаляются, длина каждой части, кроме последней, кратна 4:
+        остаток переносится в следующую часть.
+
+        Args:
+            data (str): Строка с base64.
+            begin (int): Начало base64 в строке.
+
+        Yields:
+            str: Очередная часть base64.
+        """
+        rest = ''
+        for start in range(begin, len(data), conf.IMAGE_DECODE_CHUNK):
+            chunk = rest + ''.join(
+                data[start:start + conf.IMAGE_DECODE_CHUNK].split()
+            )
+            end = len(chunk) // 4 * 4
+            chunk, rest = chunk[:end], chunk[end:]
+            if chunk:
+                yield chunk
+        if rest:
+            yield rest
+
+    def check_header(self, file, final):
+        """Проверяет формат и размеры изображения по заголовку.
+
+        Args:
+            file (UploadedFile): Записанная часть изображения.
+            final (bool): Файл записан полностью.
+
+        Raises:
+            ValidationError: Недопустимый формат или размеры.
+
+        Returns:
+            bool: Заголовок прочитан и проверен.
+        """
+        position = file.tell()
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                fmt, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            self.fail(
+                'dimensions',
+                max_side=conf.IMAGE_MAX_SIDE,
+                max_pixels=conf.IMAGE_MAX_PIXELS,
+            )
+        except (UnidentifiedImageError, OSError):
+            if final:
+                self.fail('invalid_image')
+            return False
+        finally:
+            file.seek(position)
+
+        if fmt not in conf.IMAGE_FORMATS:
+            self.fail('format', formats=', '.join(conf.IMAGE_FORMATS))
+        if (
+            max(width, height) > conf.IMAGE_MAX_SIDE
+            or width * height > conf.IMAGE_MAX_PIXELS
+        ):
+            self.fail(
+                'dimensions',
+                max_side=conf.IMAGE_MAX_SIDE,
+                max_pixels=conf.IMAGE_MAX_PIXELS,
+            )
+        file.name = f'image.{fmt.lower()}'
+        return True
 
 
 class Hex2NameColor(serializers.Field):
@@ -1,7 +1,11 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
 from recipes.models import Ingredient, Recipe
 
+from . import conf
+from .services import recipe_in_user_list
+
 
 class IngredientFilter(filters.FilterSet):
     name = filters.CharFilter(
@@ -15,21 +19,97 @@ class IngredientFilter(filters.FilterSet):
 
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
-    is_favorited = filters.BooleanFilter(method='filter_is_favorited')
-    is_in_shopping_cart = filters.BooleanFilter(
+    """Фильтры списка рецептов.
+
+    Фильтры по связям Many-To-Many строятся как коррелированные подзапросы
+    `EXISTS`/`NOT EXISTS` по промежуточным таблицам, поэтому не размножают
+    строки рецептов и не требуют `DISTINCT`.
+    Фильтры `is_favorited` и `is_in_shopping_cart` применяются
+    только для авторизованного пользователя.
+
+    Example:
+        /api/recipes/?tags=lunch&tags=dinner&is_favorited=1
+        /api/recipes/?author=3&is_in_shopping_cart=0
+        /api/recipes/?ordering=popular
+    """
+    tags = filters.CharFilter(method='filter_tags')
+    author = filters.NumberFilter(field_name='author')
+    is_favorited = filters.CharFilter(method='filter_is_favorited')
+    is_in_shopping_cart = filters.CharFilter(
         method='filter_is_in_shopping_cart')
+    ordering = filters.CharFilter(method='filter_ordering')
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'in_favorite', 'is_in_shopping_cart')
+        fields = (
+            conf.TAGS, conf.AUTHOR, conf.FAVORITE, conf.SHOP_CART,
+            conf.ORDERING,
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """Рецепты, у которых есть хотя бы один из переданных тэгов.
+
+        Args:
+            queryset (QuerySet): Queryset рецептов.
+            name (str): Название параметра запроса.
+            value (str): Последнее значение параметра (не используется,
+                все значения берутся из запроса).
+
+        Returns:
+            QuerySet: Отфильтрованный queryset.
+        """
+        slugs = self.data.getlist(name)
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag__slug__in=slugs
+            )
+        ))
 
     def filter_is_favorited(self, queryset, name, value):
-        if value:
-            return queryset.filter(in_favorite__user=self.request.user)
-        return queryset
+        return self.filter_user_list(
+            queryset, Recipe.favorite.through, value
+        )
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        if value:
-            return queryset.filter(shopping_cart__user=self.request.user)
+        return self.filter_user_list(queryset, Recipe.cart.through, value)
+
+    def filter_ordering(self, queryset, name, value):
+        """Сортирует рецепты.
+
+        Args:
+            queryset (QuerySet): Queryset рецептов.
+            name (str): Название параметра запроса.
+            value (str): `conf.ORDERING_POPULAR` - по количеству добавлений
+                в избранное. Остальные значения игнорируются.
+
+        Returns:
+            QuerySet: Отсортированный queryset.
+        """
+        if value == conf.ORDERING_POPULAR:
+            return queryset.order_by(*conf.ORDERING_POPULAR_FIELDS)
+        return queryset
+
+    def filter_user_list(self, queryset, through, value):
+        """Фильтрует рецепты по наличию в списке пользователя.
+
+        Args:
+            queryset (QuerySet): Queryset рецептов.
+            through (Model): Промежуточная модель списка пользователя.
+            value (str):
+                Значение из `conf.SYMBOL_TRUE_SEARCH` - только рецепты
+                из списка, из `conf.SYMBOL_FALSE_SEARCH` - только вне списка.
+                Остальные значения игнорируются.
+
+        Returns:
+            QuerySet: Отфильтрованный queryset.
+        """
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+
+        in_list = recipe_in_user_list(through, user)
+        if value in conf.SYMBOL_TRUE_SEARCH:
+            return queryset.filter(in_list)
+        if value in conf.SYMBOL_FALSE_SEARCH:
+            return queryset.filter(~in_list)
         return queryset
@@ -0,0 +1,146 @@
+"""Обработка изображений рецептов.
+
+Загруженное изображение сохраняется сразу, а уменьшенные копии
+(`conf.IMAGE_VARIANTS`) в форматах `conf.IMAGE_VARIANT_FORMATS`
+создаются пулом потоков после завершения транзакции, вне запроса.
+
+Готовые варианты записываются в `Recipe.image_variants`:
+    {'source': <имя исходного файла>,
+     'files': {<вариант>: {<расширение>: <имя файла>}}}
+Пока варианты не готовы (или изображение заменено), отдаётся
+пустой словарь, и клиент использует исходное изображение.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from os.path import basename, splitext
+
+from PIL import Image, features
+
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils.timezone import now
+
+from recipes.models import Recipe
+
+from . import conf
+from .cache import invalidate_recipes
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=conf.IMAGE_WORKERS, thread_name_prefix='recipe-images'
+)
+
+
+def variant_formats():
+    """Возвращает форматы вариантов, поддерживаемые установленным Pillow.
+
+    Returns:
+        dict: Формат Pillow по расширению файла.
+    """
+    return {
+        ext: fmt for ext, fmt in conf.IMAGE_VARIANT_FORMATS.items()
+        if fmt != 'WEBP' or features.check('webp')
+    }
+
+
+def schedule_variants(recipe):
+    """Ставит создание вариантов изображения в очередь.
+
+    Задача отправляется в пул после успешного завершения транзакции,
+    если варианты для текущего изображения ещё не созданы.
+
+    Args:
+        recipe (Recipe): Сохранённый рецепт.
+    """
+    if not recipe.image:
+        return
+    if recipe.image_variants.get('source') == recipe.image.name:
+        return
+    recipe_id, source = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: executor.submit(make_variants, recipe_id, source)
+    )
+
+
+def make_variants(recipe_id, source):
+    """Создаёт варианты изображения и записывает их в рецепт.
+
+    Выполняется в потоке пула. Если за время обработки изображение
+    рецепта заменили, результат не записывается.
+
+    Args:
+        recipe_id (int): id рецепта.
+        source (str): Имя исходного файла в хранилище.
+    """
+    try:
+        storage = Recipe._meta.get_field('image').storage
+        with storage.open(source) as file:
+            image = Image.open(file)
+            image.load()
+
+        stem = splitext(basename(source))[0]
+        formats = variant_formats()
+        files = {}
+        for variant, size in conf.IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(size)
+            files[variant] = {
+                ext: storage.save(
+                    f'{conf.IMAGE_VARIANTS_DIR}{stem}_{variant}.{ext}',
+                    ContentFile(encode(resized, fmt)),
+                )
+                for ext, fmt in formats.items()
+            }
+
+        updated = Recipe.objects.filter(pk=recipe_id, image=source).update(
+            image_variants={'source': source, 'files': files},
+            updated_at=now(),
+        )
+        if updated:
+            invalidate_recipes(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', source)
+    finally:
+        connections.close_all()
+
+
+def encode(image, fmt):
+    """Кодирует изображение в заданный формат.
+
+    Args:
+        image (Image): Изображение Pillow.
+        fmt (str): Формат Pillow.
+
+    Returns:
+        bytes: Содержимое файла.
+    """
+    if fmt == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, fmt, quality=conf.IMAGE_VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def variant_urls(recipe, request=None):
+    """Возвращает ссылки на готовые варианты изображения рецепта.
+
+    Args:
+        recipe (Recipe): Рецепт.
+        request (Request): Запрос для построения абсолютных ссылок.
+
+    Returns:
+        dict: Ссылки по варианту и расширению файла,
+        пустой словарь - если варианты ещё не готовы.
+    """
+    variants = recipe.image_variants or {}
+    if not recipe.image or variants.get('source') != recipe.image.name:
+        return {}
+
+    storage = recipe.image.storage
+    build = request.build_absolute_uri if request is not None else str
+    return {
+        variant: {ext: build(storage.url(name)) for ext, name in names.items()}
+        for variant, names in variants['files'].items()
+    }
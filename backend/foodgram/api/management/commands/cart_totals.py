@@ -0,0 +1,89 @@
+"""Пересчёт сумм ингредиентов в списках покупок.
+
+Сравнивает таблицу CartAmountIngredient с суммами, посчитанными
+по рецептам в списках покупок, и перезаписывает расхождения.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from recipes.models import CartAmountIngredient
+
+from users.models import User
+
+from api.services import cart_totals_live
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает суммы ингредиентов в списках покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только показать расхождения, не изменяя данные.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество пользователей, обрабатываемых за один раз.',
+        )
+
+    def handle(self, *args, verify, batch_size, **options):
+        user_ids = User.objects.filter(
+            Q(carts__isnull=False) | Q(cart_ingredients__isnull=False)
+        ).distinct().order_by('id').values_list('id', flat=True)
+
+        checked = mismatched = 0
+        batch = []
+        for user_id in user_ids.iterator():
+            batch.append(user_id)
+            if len(batch) == batch_size:
+                mismatched += self.process(batch, verify)
+                checked += len(batch)
+                batch = []
+        if batch:
+            mismatched += self.process(batch, verify)
+            checked += len(batch)
+
+        action = 'Расхождений' if verify else 'Исправлено'
+        self.stdout.write(
+            f'Проверено пользователей: {checked}. {action}: {mismatched}.'
+        )
+
+    def process(self, user_ids, verify):
+        """Сверяет и исправляет суммы для группы пользователей.
+
+        Args:
+            user_ids (list[int]): id владельцев списков покупок.
+            verify (bool): Не изменять данные.
+
+        Returns:
+            int: Количество пользователей с расхождениями.
+        """
+        live = cart_totals_live(user_ids)
+        stored = {
+            (user_id, pk): amount
+            for user_id, pk, amount in CartAmountIngredient.objects.filter(
+                user_id__in=user_ids
+            ).values_list('user', 'ingredient', 'amount')
+        }
+        wrong = {
+            user_id
+            for user_id, pk in live.keys() | stored.keys()
+            if live.get((user_id, pk)) != stored.get((user_id, pk))
+        }
+        if verify or not wrong:
+            return len(wrong)
+
+        with transaction.atomic():
+            CartAmountIngredient.objects.filter(user_id__in=wrong).delete()
+            CartAmountIngredient.objects.bulk_create(
+                CartAmountIngredient(
+                    user_id=user_id, ingredient_id=pk, amount=amount
+                )
+                for (user_id, pk), amount in live.items()
+                if user_id in wrong
+            )
+        return len(wrong)
@@ -0,0 +1,45 @@
+"""Выгрузка всех рецептов в NDJSON для аналитики."""
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api import conf
+from api.export import export_recipes, gzip_stream, ndjson_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все рецепты в формате NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки, `-` - стандартный вывод.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать выгрузку в gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=conf.EXPORT_CHUNK_SIZE,
+            help='Количество рецептов, читаемых из базы данных за раз.',
+        )
+
+    def handle(self, *args, output, gzip, chunk_size, **options):
+        stream = ndjson_lines(export_recipes(chunk_size))
+        if gzip:
+            stream = gzip_stream(stream)
+
+        if output == '-':
+            self.write(sys.stdout.buffer, stream)
+            sys.stdout.buffer.flush()
+        else:
+            with open(output, 'wb') as file:
+                self.write(file, stream)
+
+    def write(self, file, stream):
+        for chunk in stream:
+            file.write(chunk)
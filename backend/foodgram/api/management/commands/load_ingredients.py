@@ -0,0 +1,266 @@
+"""Загрузка ингредиентов и тэгов из файлов.
+
+Поддерживаются форматы:
+    csv    - строки `название,единицы измерения` (заголовок необязателен,
+             читается потоком);
+    json   - список объектов `{"name": , "measurement_unit": }`
+             (загружается в память целиком);
+    ndjson - по одному такому объекту в строке (читается потоком).
+
+Ингредиенты уникальны по паре (`name`, `measurement_unit`) - ограничение
+`unique_for_ingredient`. Других полей у ингредиента нет, поэтому
+существующие строки не обновляются, а пропускаются.
+На PostgreSQL строки загружаются через `COPY` во временную таблицу
+и переносятся одним `INSERT ... ON CONFLICT DO NOTHING`,
+на остальных базах - `bulk_create(ignore_conflicts=True)` частями.
+"""
+import csv
+import json
+from io import StringIO
+from itertools import islice
+from os.path import splitext
+from time import monotonic
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.utils.timezone import now
+
+from recipes.models import Ingredient, Recipe, Tag
+
+from api import conf
+from api.cache import invalidate_all_recipes, invalidate_catalog
+
+DEFAULT_PATH = settings.BASE_DIR / 'recipes' / 'data' / 'ingredients.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает ингредиенты (и тэги) из файлов csv, json или ndjson. '
+        'Файлы csv и ndjson читаются потоком, json загружается в память '
+        'целиком - для больших каталогов используйте ndjson.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=str(DEFAULT_PATH),
+            help='Файл с ингредиентами (.csv, .json, .ndjson, .jsonl).',
+        )
+        parser.add_argument(
+            '--tags',
+            help='Файл с тэгами: объекты `{"name": , "color": , "slug": }`.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк, записываемых за один запрос.',
+        )
+
+    def handle(self, *args, path, tags, batch_size, **options):
+        start = monotonic()
+        rows = self.read_ingredients(path)
+        if connection.vendor == 'postgresql':
+            inserted, total = self.copy_ingredients(rows, batch_size)
+        else:
+            inserted, total = self.bulk_ingredients(rows, batch_size)
+        invalidate_catalog('ingredients')
+        self.report('Ингредиенты', inserted, 0, total - inserted)
+
+        if tags:
+            self.load_tags(tags)
+
+        self.stdout.write(f'Время загрузки: {monotonic() - start:.2f} с.')
+
+    def report(self, title, inserted, updated, skipped):
+        self.stdout.write(
+            f'{title}: добавлено {inserted}, обновлено {updated}, '
+            f'пропущено {skipped}.'
+        )
+
+    def read_records(self, path):
+        """Читает записи из файла в зависимости от его расширения.
+
+        Args:
+            path (str): Путь к файлу.
+
+        Yields:
+            dict | list: Запись файла.
+        """
+        extension = splitext(path)[1].lower()
+        try:
+            with open(path, encoding='utf-8') as file:
+                if extension == '.csv':
+                    yield from csv.reader(file)
+                elif extension == '.json':
+                    yield from json.load(file)
+                elif extension in ('.ndjson', '.jsonl'):
+                    for line in file:
+                        if line.strip():
+                            yield json.loads(line)
+                else:
+                    raise CommandError(f'Неизвестный формат файла: {path}')
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+    def read_ingredients(self, path):
+        """Читает пары (название, единицы измерения) из файла.
+
+        Пустые и слишком длинные значения пропускаются.
+
+        Yields:
+            tuple: (name, measurement_unit) или None для пропущенной записи.
+        """
+        for record in self.read_records(path):
+            if isinstance(record, dict):
+                record = (
+                    record.get('name'), record.get('measurement_unit')
+                )
+            if not isinstance(record, (list, tuple)) or len(record) != 2:
+                yield None
+                continue
+            name, unit = (str(value or '').strip() for value in record)
+            if (
+                not name or not unit
+                or (name, unit) == ('name', 'measurement_unit')
+                or len(name) > conf.MAX_LEN_RECIPES_CHARFIELD
+                or len(unit) > conf.MAX_LEN_RECIPES_CHARFIELD
+            ):
+                yield None
+                continue
+            yield name, unit
+
+    def copy_ingredients(self, rows, batch_size):
+        """Загружает ингредиенты через `COPY` во временную таблицу.
+
+        Returns:
+            tuple(int, int): Добавлено строк, прочитано записей.
+        """
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        total = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_staging '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                total += len(batch)
+                buffer = StringIO()
+                csv.writer(buffer).writerows(row for row in batch if row)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_staging FROM STDIN WITH (FORMAT csv)',
+                    buffer,
+                )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_staging '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            return cursor.rowcount, total
+
+    def bulk_ingredients(self, rows, batch_size):
+        """Загружает ингредиенты частями через `bulk_create`.
+
+        Returns:
+            tuple(int, int): Добавлено строк, прочитано записей.
+        """
+        before = Ingredient.objects.count()
+        total = 0
+        with transaction.atomic():
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                total += len(batch)
+                Ingredient.objects.bulk_create(
+                    (
+                        Ingredient(name=name, measurement_unit=unit)
+                        for name, unit in set(filter(None, batch))
+                    ),
+                    ignore_conflicts=True,
+                )
+        return Ingredient.objects.count() - before, total
+
+    def load_tags(self, path):
+        """Добавляет новые и обновляет изменённые тэги по `slug`."""
+        tags = {}
+        skipped = 0
+        for record in self.read_records(path):
+            try:
+                tag = Tag(
+                    name=str(record['name']).strip(),
+                    color=str(record.get('color') or '').strip(' #') or None,
+                    slug=str(record['slug']).strip(),
+                )
+            except (KeyError, TypeError, AttributeError):
+                skipped += 1
+                continue
+            if tag.slug in tags:
+                skipped += 1
+            tags[tag.slug] = tag
+
+        existing = {
+            tag.slug: (tag.name, tag.color)
+            for tag in Tag.objects.filter(slug__in=tags)
+        }
+        changed = [
+            tag for slug, tag in tags.items()
+            if existing.get(slug) != (tag.name, tag.color)
+        ]
+        updated = sum(tag.slug in existing for tag in changed)
+        skipped += len(tags) - len(changed)
+
+        if changed:
+            try:
+                with transaction.atomic():
+                    Tag.objects.bulk_create(
+                        changed,
+                        update_conflicts=True,
+                        unique_fields=('slug',),
+                        update_fields=('name', 'color'),
+                    )
+                    Recipe.objects.filter(
+                        tags__slug__in=[tag.slug for tag in changed]
+                    ).update(updated_at=now())
+            except IntegrityError as error:
+                raise CommandError(self.tag_conflict(changed, error))
+            invalidate_catalog('tags')
+            invalidate_all_recipes()
+        self.report('Тэги', len(changed) - updated, updated, skipped)
+
+    def tag_conflict(self, tags, error):
+        """Описывает тэг, который не удалось записать.
+
+        Args:
+            tags (list[Tag]): Записываемые тэги.
+            error (IntegrityError): Ошибка базы данных.
+
+        Returns:
+            str: Сообщение об ошибке.
+        """
+        names = {}
+        for tag in tags:
+            if not tag.name or not tag.slug:
+                return f'Тэг "{tag.slug}": пустое название или slug.'
+            if tag.name in names:
+                return (
+                    f'Тэги "{names[tag.name]}" и "{tag.slug}": '
+                    f'одинаковое название "{tag.name}".'
+                )
+            names[tag.name] = tag.slug
+        for name, slug in Tag.objects.filter(
+            name__in=names
+        ).values_list('name', 'slug'):
+            if names[name] != slug:
+                return (
+                    f'Тэг "{names[name]}": название "{name}" '
+                    f'уже у тэга "{slug}".'
+                )
+        return f'Не удалось записать тэги: {error}'
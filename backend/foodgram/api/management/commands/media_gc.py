@@ -0,0 +1,115 @@
+"""Поиск и удаление неиспользуемых изображений рецептов.
+
+Файл считается неиспользуемым, если на него не ссылается ни один
+рецепт: ни полем `image`, ни среди вариантов `image_variants`.
+Недавно созданные файлы пропускаются - они могут принадлежать
+рецепту, транзакция которого ещё не завершена.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from recipes.models import Recipe
+
+IMAGE_FIELD = Recipe._meta.get_field('image')
+
+
+class Command(BaseCommand):
+    help = 'Показывает и удаляет изображения, не связанные с рецептами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Удалить найденные файлы (по умолчанию только список).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество файлов, проверяемых одним запросом.',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=24,
+            help='Не трогать файлы моложе указанного числа часов.',
+        )
+
+    def handle(self, *args, delete, batch_size, min_age, **options):
+        storage = IMAGE_FIELD.storage
+        self.variants = self.referenced_variants(batch_size)
+        self.deadline = now() - timedelta(hours=min_age)
+
+        checked = orphans = 0
+        batch = []
+        for name in self.walk(storage, IMAGE_FIELD.upload_to):
+            batch.append(name)
+            if len(batch) == batch_size:
+                orphans += self.process(storage, batch, delete)
+                checked += len(batch)
+                batch = []
+        if batch:
+            orphans += self.process(storage, batch, delete)
+            checked += len(batch)
+
+        action = 'Удалено' if delete else 'Не используется'
+        self.stdout.write(f'Проверено файлов: {checked}. {action}: {orphans}.')
+
+    def referenced_variants(self, batch_size):
+        """Собирает имена файлов вариантов изображений всех рецептов.
+
+        Returns:
+            set: Имена файлов в хранилище.
+        """
+        names = set()
+        variants = Recipe.objects.exclude(image_variants={}).values_list(
+            'image_variants', flat=True
+        )
+        for variant in variants.iterator(chunk_size=batch_size):
+            for files in variant.get('files', {}).values():
+                names.update(files.values())
+        return names
+
+    def walk(self, storage, path):
+        """Перебирает файлы каталога хранилища и его подкаталогов.
+
+        Yields:
+            str: Имя файла в хранилище.
+        """
+        if not storage.exists(path):
+            return
+        directories, files = storage.listdir(path)
+        for name in files:
+            yield f'{path}{name}'
+        for directory in directories:
+            yield from self.walk(storage, f'{path}{directory}/')
+
+    def process(self, storage, names, delete):
+        """Находит и удаляет неиспользуемые файлы из группы.
+
+        Args:
+            storage (Storage): Хранилище изображений.
+            names (list[str]): Имена проверяемых файлов.
+            delete (bool): Удалять найденные файлы.
+
+        Returns:
+            int: Количество неиспользуемых файлов.
+        """
+        used = set(
+            Recipe.objects.filter(image__in=names).values_list(
+                'image', flat=True
+            )
+        )
+        orphans = [
+            name for name in names
+            if name not in used
+            and name not in self.variants
+            and storage.get_modified_time(name) < self.deadline
+        ]
+        for name in orphans:
+            self.stdout.write(name)
+            if delete:
+                storage.delete(name)
+        return len(orphans)
@@ -0,0 +1,68 @@
+"""Пересчёт счётчиков избранного, списков покупок и подписчиков.
+
+Счётчики `Recipe.favorites_count`, `Recipe.in_carts_count`
+и `User.subscribers_count` обновляются при работе со списками через API
+и через `.add()`/`.remove()`/`.clear()` (админка, код).
+Изменения промежуточных таблиц без сигналов (загрузка данных,
+SQL, `QuerySet.delete()`) счётчики не меняют - команда сверяет их
+с промежуточными таблицами и исправляет расхождения.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import conf
+from api.cache import touch_popularity
+from api.services import USER_LIST_COUNTERS, related_count, user_list_field
+
+
+class Command(BaseCommand):
+    help = 'Сверяет и исправляет счётчики избранного, покупок и подписчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество объектов, проверяемых одним запросом.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        for meneger, counter in USER_LIST_COUNTERS.items():
+            through, _, target, model = user_list_field(meneger)
+            fixed = self.recount(
+                model, counter, related_count(through, target), batch_size
+            )
+            if fixed and meneger == conf.FAVORITE_M2M:
+                touch_popularity()
+            self.stdout.write(
+                f'{model._meta.label}.{counter}: исправлено {fixed}.'
+            )
+
+    def recount(self, model, counter, expression, batch_size):
+        """Исправляет счётчик у объектов, где он разошёлся с данными.
+
+        Args:
+            model (Model): Модель со счётчиком.
+            counter (str): Название поля счётчика.
+            expression (Expression): Подзапрос актуального значения.
+            batch_size (int): Количество объектов за один запрос.
+
+        Returns:
+            int: Количество исправленных объектов.
+        """
+        fixed = 0
+        ids = model.objects.order_by('id').values_list('id', flat=True)
+        last_id = 0
+        while True:
+            chunk = list(ids.filter(id__gt=last_id)[:batch_size])
+            if not chunk:
+                return fixed
+            last_id = chunk[-1]
+            with transaction.atomic():
+                stale = list(model.objects.filter(id__in=chunk).exclude(
+                    **{counter: expression}
+                ).values_list('id', flat=True))
+                if stale:
+                    fixed += model.objects.filter(id__in=stale).update(
+                        **{counter: expression}
+                    )
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+INDEXES = (
+    ('recipes_recipe_tags', 'tag_id', 'recipe_id'),
+    ('recipes_recipe_favorite', 'user_id', 'recipe_id'),
+    ('recipes_recipe_cart', 'user_id', 'recipe_id'),
+)
+
+
+def index_operation(table, *columns):
+    name = f'{table}_{"_".join(c[:-3] for c in columns)}_idx'
+    return migrations.RunSQL(
+        sql=(
+            f'CREATE INDEX IF NOT EXISTS {name} '
+            f'ON {table} ({", ".join(columns)});'
+        ),
+        reverse_sql=f'DROP INDEX IF EXISTS {name};',
+    )
+
+
+class Migration(migrations.Migration):
+    """Составные индексы промежуточных таблиц Many-To-Many рецептов.
+
+    Уникальные индексы `(recipe_id, ...)` создаются Django автоматически,
+    здесь добавляются обратные - для фильтров `EXISTS` в `RecipeFilter`,
+    когда план запроса начинается со стороны тэга или пользователя.
+    """
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [index_operation(*index) for index in INDEXES]
@@ -0,0 +1,36 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+INDEX_NAME = 'recipes_ingredient_name_trgm_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+        'ON recipes_ingredient USING gin (name gin_trgm_ops);'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME};')
+
+
+class Migration(migrations.Migration):
+    """Триграммный GIN-индекс названий ингредиентов.
+
+    Используется нечётким поиском ингредиентов (`api.search`)
+    для операторов `%` и `LIKE`. На других СУБД не выполняется.
+    """
+
+    dependencies = [
+        ('api', '0001_recipe_m2m_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -2,21 +2,36 @@
 для настройки основных классов приложения.
 """
 
+from hashlib import md5
+
+from asgiref.sync import sync_to_async
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                parse_etags)
+from django.utils.http import http_date, quote_etag
 
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.status import (HTTP_201_CREATED, HTTP_204_NO_CONTENT,
                                    HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED)
 
 from . import conf
+from .cache import RenderedCatalog, cache_shared, user_lists_stamp
+from .services import (accepts_gzip, is_positive_int, user_list_change,
+                       validate_ids)
 
 
 class AddDelViewMixin:
     """
     Добавляет во Viewset дополнительные методы.
 
-    Содержит метод добавляющий/удаляющий объект связи
-    Many-to-Many между моделями.
+    Содержит методы добавляющие/удаляющие объекты связи
+    Many-to-Many между моделями: по одному и списком.
     Требует определения атрибута `add_serializer`.
 
     Example:
@@ -33,16 +48,20 @@ class AddDelViewMixin:
     add_serializer = None
 
     def add_del_obj(self, obj_id, meneger):
-        """Добавляет/удаляет связь через менеджер `model.many-to-many`.
+        """Добавляет/удаляет связь в списке пользователя.
 
-        Доступные для работы менеджеры-М2М должны быть внесены в словарь
-        `menegers` откуда будут вызываться в зависимости от переданного ключа.
+        Связь добавляется (удаляется) одним запросом к промежуточной
+        таблице М2М без предварительной проверки, поэтому повторные
+        одновременные запросы не создают гонки. Доступные списки
+        перечислены в `services.user_list_field`.
+        При изменении списка покупок в той же транзакции обновляются
+        суммы ингредиентов (CartAmountIngredient).
 
         Args:
             obj_id (int):
                 id обЪекта, с которым требуется создать/удалить связь.
-            meneger (model.ManyRelatedManager):
-                Менеджер указанной модели управляющий требуемой связью.
+            meneger (str):
+                Ключ списка из `conf`.
 
         Returns:
             Responce: Статус подтверждающий/отклоняющий действие.
@@ -55,25 +74,405 @@ class AddDelViewMixin:
         user = self.request.user
         if user.is_anonymous:
             return Response(status=HTTP_401_UNAUTHORIZED)
+        if not is_positive_int(obj_id):
+            raise Http404
+        obj_id = int(obj_id)
 
-        menegers = {
-            conf.SUBSCRIBE_M2M: user.subscribe,
-            conf.FAVORITE_M2M: user.favorites,
-            conf.SHOP_CART_M2M: user.carts,
-        }
-        meneger = menegers[meneger]
+        add = self.request.method in conf.ADD_METHODS
+        changed = user_list_change(meneger, user.id, [obj_id], add)
+        if not changed:
+            get_object_or_404(self.queryset, id=obj_id)
+            return Response(status=HTTP_400_BAD_REQUEST)
+        if not add:
+            return Response(status=HTTP_204_NO_CONTENT)
 
-        obj = get_object_or_404(self.queryset, id=obj_id)
         serializer = self.add_serializer(
-            obj, context={'request': self.request}
+            get_object_or_404(self.queryset, id=obj_id),
+            context={'request': self.request},
         )
-        obj_exist = meneger.filter(id=obj_id).exists()
+        return Response(serializer.data, status=HTTP_201_CREATED)
 
-        if (self.request.method in conf.ADD_METHODS) and not obj_exist:
-            meneger.add(obj)
-            return Response(serializer.data, status=HTTP_201_CREATED)
+    def add_del_batch(self, meneger):
+        """Добавляет/удаляет несколько связей в списке пользователя.
 
-        if (self.request.method in conf.DEL_METHODS) and obj_exist:
-            meneger.remove(obj)
-            return Response(status=HTTP_204_NO_CONTENT)
-        return Response(status=HTTP_400_BAD_REQUEST)
+        id объектов передаются в теле запроса: `{"ids": [1, 2, 3]}`.
+        Все связи добавляются (удаляются) одним запросом.
+
+        Args:
+            meneger (str):
+                Ключ списка из `conf`.
+
+        Returns:
+            Responce: id добавленных (удалённых) объектов
+            или ошибки в переданных id.
+        """
+        user = self.request.user
+        if user.is_anonymous:
+            return Response(status=HTTP_401_UNAUTHORIZED)
+
+        ids = self.request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response(
+                {'ids': ['Передайте непустой список id.']},
+                status=HTTP_400_BAD_REQUEST,
+            )
+        if len(ids) > conf.BATCH_MAX_IDS:
+            return Response(
+                {'ids': [f'Не больше {conf.BATCH_MAX_IDS} id за раз.']},
+                status=HTTP_400_BAD_REQUEST,
+            )
+        objects, errors = validate_ids(ids, self.queryset.model)
+        if errors:
+            return Response({'ids': errors}, status=HTTP_400_BAD_REQUEST)
+
+        add = self.request.method in conf.ADD_METHODS
+        changed = user_list_change(meneger, user.id, list(objects), add)
+        return Response({'ids': sorted(changed)})
+
+
+async def serializer_data(serializer):
+    """Получает данные сериализатора в потоке.
+
+    Сериализаторы обращаются к кэшу и могут догружать связанные
+    объекты (`prefetch_related_objects`), что недопустимо
+    в асинхронном контексте.
+
+    Args:
+        serializer (Serializer): Сериализатор с объектами.
+
+    Returns:
+        ReturnDict | ReturnList: `serializer.data`.
+    """
+    return await sync_to_async(lambda: serializer.data)()
+
+
+class AsyncReadMixin:
+    """
+    Добавляет во Viewset асинхронные `alist` и `aretrieve`.
+
+    Методы повторяют `list` и `retrieve`, но объекты выбираются
+    асинхронным ORM (`async for`, `aget`), а пагинатор должен
+    поддерживать `apaginate_queryset`. Вызываются представлениями
+    из `api.async_views`.
+
+    Example:
+        class ExampleViewSet(AsyncReadMixin, ReadOnlyModelViewSet)
+            ...
+    """
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = None
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(
+                queryset, request, view=self
+            )
+        if page is not None:
+            data = await serializer_data(self.get_serializer(page, many=True))
+            return self.get_paginated_response(data)
+
+        objects = [obj async for obj in queryset]
+        return Response(
+            await serializer_data(self.get_serializer(objects, many=True))
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(await serializer_data(self.get_serializer(instance)))
+
+    async def aget_object(self):
+        """Асинхронный вариант `get_object`.
+
+        Raises:
+            Http404: Объект не найден.
+
+        Returns:
+            Model: Объект, доступ к которому разрешён.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup]}
+            )
+        except (
+            queryset.model.DoesNotExist, TypeError, ValueError,
+            ValidationError,
+        ):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class ConditionalGetMixin:
+    """
+    Добавляет во Viewset условные GET-запросы для `list` и `retrieve`.
+
+    До выполнения основного запроса и сериализации одним агрегирующим
+    запросом вычисляются максимальная дата изменения (`updated_at`)
+    и количество отфильтрованных объектов. Из них, параметров запроса
+    и отметки изменения списков пользователя строится ETag.
+    При совпадении с `If-None-Match` (для объекта - также
+    с `If-Modified-Since`) возвращается `304 Not Modified`.
+    Модель должна содержать поле `updated_at`. Если ответ зависит
+    от других данных, их отметку возвращает `get_etag_extra()`.
+    Асинхронные `alist` и `aretrieve` работают так же
+    поверх `AsyncReadMixin`. Отметки списков хранятся в кэше, поэтому
+    с кэшем в памяти процесса (`api.cache.cache_shared`) валидаторы
+    не выдаются: другой процесс вернул бы `304` после изменения.
+
+    Example:
+        class ExampleViewSet(ConditionalGetMixin, ModelViewSet)
+            ...
+    """
+
+    def get_etag_extra(self, request):
+        """Дополнительная часть ETag ответа.
+
+        Args:
+            request (Request): Текущий запрос.
+
+        Returns:
+            str: Отметка данных, от которых зависит ответ.
+        """
+        return ''
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_stamp_queryset(), super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_stamp_queryset(**kwargs), super().retrieve, request,
+            *args, is_detail=True, **kwargs
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            self.get_stamp_queryset(), super().alist, request,
+            *args, **kwargs
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            self.get_stamp_queryset(**kwargs), super().aretrieve, request,
+            *args, is_detail=True, **kwargs
+        )
+
+    def get_stamp_queryset(self, **kwargs):
+        """Отфильтрованные объекты ответа для вычисления ETag.
+
+        Args:
+            kwargs: Аргументы URL. Для объекта содержат его `lookup_field`.
+
+        Raises:
+            Http404: Значение `lookup_field` некорректно.
+
+        Returns:
+            QuerySet: Объекты без аннотаций и предзагрузок.
+        """
+        queryset = self.queryset.model.objects.all()
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        if lookup in kwargs:
+            try:
+                queryset = queryset.filter(
+                    **{self.lookup_field: kwargs[lookup]}
+                )
+            except (TypeError, ValueError, ValidationError):
+                raise Http404
+        return self.filter_queryset(queryset)
+
+    def conditional_response(self, queryset, view, request, *args,
+                             is_detail=False, **kwargs):
+        """Возвращает `304` или ответ `view` с заголовками валидаторов.
+
+        Args:
+            queryset (QuerySet):
+                Отфильтрованные объекты, попадающие в ответ.
+            view (callable):
+                Метод, формирующий полный ответ.
+            is_detail (bool):
+                Учитывать ли `If-Modified-Since`. Для списка не учитывается,
+                так как удаление объекта не меняет максимальную дату.
+
+        Returns:
+            Response: Ответ `view` или `304 Not Modified`.
+        """
+        if not cache_shared():
+            return view(request, *args, **kwargs)
+        stamp = queryset.aggregate(
+            updated_at=Max('updated_at'), count=Count('id')
+        )
+        if not stamp['count']:
+            return view(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request, stamp)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified) if is_detail else None,
+        )
+        if response is None:
+            response = view(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    async def aconditional_response(self, queryset, view, request, *args,
+                                    is_detail=False, **kwargs):
+        """Асинхронный вариант `conditional_response`.
+
+        Args:
+            view (coroutine function): Асинхронный метод ответа.
+
+        Returns:
+            Response: Ответ `view` или `304 Not Modified`.
+        """
+        if not cache_shared():
+            return await view(request, *args, **kwargs)
+        stamp = await queryset.aaggregate(
+            updated_at=Max('updated_at'), count=Count('id')
+        )
+        if not stamp['count']:
+            return await view(request, *args, **kwargs)
+
+        etag, last_modified = await sync_to_async(self.get_validators)(
+            request, stamp
+        )
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified) if is_detail else None,
+        )
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    def get_validators(self, request, stamp):
+        """Вычисляет ETag и дату изменения ответа.
+
+        Args:
+            request (Request): Текущий запрос.
+            stamp (dict): Максимальная `updated_at` и количество объектов.
+
+        Returns:
+            tuple: ETag и Unix-время изменения.
+        """
+        user = request.user
+        last_modified = stamp['updated_at'].timestamp()
+        user_part = 'anonymous'
+        if user.is_authenticated:
+            user_stamp = user_lists_stamp(user.id)
+            last_modified = max(last_modified, user_stamp)
+            user_part = f'{user.id}:{user_stamp}'
+        etag = quote_etag(md5(
+            f'{stamp["updated_at"].isoformat()}|{stamp["count"]}|'
+            f'{request.get_full_path()}|{request.accepted_renderer.format}|'
+            f'{user_part}|{self.get_etag_extra(request)}'.encode()
+        ).hexdigest())
+        return etag, last_modified
+
+    def set_validators(self, response, etag, last_modified):
+        """Добавляет в ответ заголовки валидаторов.
+
+        Returns:
+            Response: Тот же ответ.
+        """
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+
+class RenderedCatalogMixin:
+    """
+    Отдаёт полный список справочника из готового ответа в памяти.
+
+    Запрос списка без параметров в формате JSON не сериализует объекты,
+    а получает уже отрендеренное тело ответа (и его gzip версию)
+    из `RenderedCatalog`. Ответ содержит строгий ETag, по которому
+    повторный запрос получает `304 Not Modified`.
+    Требует определения атрибута `catalog` - названия справочника,
+    версию которого увеличивают сигналы моделей.
+    Асинхронный `alist` работает так же поверх `AsyncReadMixin`.
+
+    Example:
+        class ExampleViewSet(RenderedCatalogMixin, ReadOnlyModelViewSet)
+            ...
+            catalog = 'examples'
+    """
+
+    catalog = None
+    rendered_catalogs = {}
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        return self.catalog_response(
+            request, *self.get_rendered_catalog().get()
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return await super().alist(request, *args, **kwargs)
+        return self.catalog_response(
+            request, *await sync_to_async(self.get_rendered_catalog().get)()
+        )
+
+    def catalog_response(self, request, body, gzip_body, etag):
+        """Ответ с готовым телом справочника.
+
+        Args:
+            request (Request): Текущий запрос.
+            body (bytes): Тело ответа.
+            gzip_body (bytes): Тело ответа в gzip.
+            etag (str): ETag ответа.
+
+        Returns:
+            HttpResponse: Ответ или `304 Not Modified`.
+        """
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif accepts_gzip(request):
+            response = HttpResponse(gzip_body, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def get_rendered_catalog(self):
+        """Получает хранилище готового ответа для справочника.
+
+        Returns:
+            RenderedCatalog: Хранилище, общее для всех экземпляров
+            ViewSet в процессе.
+        """
+        assert self.catalog is not None, (
+            f'{self.__class__.__name__} should include '
+            'a `catalog` attribute.'
+        )
+        rendered = self.rendered_catalogs.get(self.catalog)
+        if rendered is None:
+            rendered = self.rendered_catalogs.setdefault(
+                self.catalog,
+                RenderedCatalog(self.catalog, type(self).render_all),
+            )
+        return rendered
+
+    @classmethod
+    def render_all(cls):
+        """Рендерит весь справочник в JSON.
+
+        Метод класса: хранилище общее для процесса и не должно
+        удерживать экземпляр ViewSet и его запрос. Справочник
+        читается из основной базы, даже если настроена реплика.
+
+        Returns:
+            bytes: Тело ответа.
+        """
+        serializer = cls.serializer_class(
+            cls.queryset.using(DEFAULT_DB_ALIAS), many=True
+        )
+        return JSONRenderer().render(serializer.data)
@@ -1,8 +1,223 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import conf
 
 
 class PageLimitPagination(PageNumberPagination):
     """Стандартный пагинатор с определением атрибута
     `page_size_query_param`, для вывода запрошенного количества страниц.
     """
-    page_size_query_param = 'limit'
+    page_size_query_param = conf.PAGE_LIMIT
+
+
+class RecipePagination(PageLimitPagination):
+    """Пагинатор рецептов с дополнительным режимом курсора.
+
+    Без параметра `cursor` работает как `PageLimitPagination`.
+    Если параметр передан (для первой страницы - пустым), то объекты
+    выбираются по ключу `(pub_date, id)` вместо `OFFSET`, а `COUNT(*)`
+    не выполняется. Ответ содержит только ссылку `next` и `results`.
+    Размер страницы курсора ограничен `conf.CURSOR_MAX_LIMIT`.
+    Для асинхронных представлений есть `apaginate_queryset`.
+    При сортировке по популярности (`ordering=popular`) ключ `(pub_date, id)`
+    не подходит, и курсор игнорируется.
+
+    Example:
+        /api/recipes/?cursor=&limit=10
+        /api/recipes/?cursor=MjAyMy0wNy0xOVQxNTo0MDo1OSsw...&limit=10
+    """
+    cursor_query_param = conf.CURSOR
+    cursor_default_limit = conf.CURSOR_DEFAULT_LIMIT
+    cursor_max_limit = conf.CURSOR_MAX_LIMIT
+    cursor_ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Неверный курсор.'
+
+    use_cursor = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.is_cursor_request(request)
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        queryset, limit = self.get_cursor_queryset(queryset, request)
+        return self.get_cursor_page(list(queryset[:limit + 1]), limit)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант `paginate_queryset`.
+
+        `COUNT(*)` и выборка страницы выполняются асинхронным ORM,
+        ответ совпадает с ответом синхронного варианта.
+
+        Args:
+            queryset (QuerySet): Объекты для разбиения на страницы.
+            request (Request): Текущий запрос.
+            view (APIView): Представление.
+
+        Raises:
+            NotFound: Неверный номер страницы или курсор.
+
+        Returns:
+            list | None: Объекты страницы или None без пагинации.
+        """
+        self.use_cursor = self.is_cursor_request(request)
+        self.request = request
+        if self.use_cursor:
+            queryset, limit = self.get_cursor_queryset(queryset, request)
+            results = [obj async for obj in queryset[:limit + 1]]
+            return self.get_cursor_page(results, limit)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return self.page.object_list
+
+    def is_cursor_request(self, request):
+        """Включён ли режим курсора.
+
+        Args:
+            request (Request): Текущий запрос.
+
+        Returns:
+            bool: True, если передан `cursor` и рецепты не сортируются
+            по популярности.
+        """
+        return (
+            self.cursor_query_param in request.query_params
+            and request.query_params.get(conf.ORDERING)
+            != conf.ORDERING_POPULAR
+        )
+
+    def get_cursor_queryset(self, queryset, request):
+        """Отбирает объекты после позиции курсора.
+
+        Args:
+            queryset (QuerySet): Объекты для разбиения на страницы.
+            request (Request): Текущий запрос.
+
+        Returns:
+            tuple: Queryset, упорядоченный по ключу курсора,
+            и размер страницы.
+        """
+        limit = self.get_cursor_limit(request)
+        queryset = queryset.order_by(*self.cursor_ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+        return queryset, limit
+
+    def get_cursor_page(self, results, limit):
+        """Формирует страницу курсора.
+
+        Args:
+            results (list): Первые `limit + 1` объектов после курсора.
+            limit (int): Размер страницы.
+
+        Returns:
+            list: Объекты страницы.
+        """
+        self.has_next = len(results) > limit
+        results = results[:limit]
+        self.next_position = (
+            (results[-1].pub_date, results[-1].id) if self.has_next else None
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_cursor_limit(self, request):
+        """Размер страницы курсора в пределах `cursor_max_limit`.
+
+        Args:
+            request (Request): Текущий запрос.
+
+        Returns:
+            int: Количество объектов на странице.
+        """
+        try:
+            limit = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.cursor_default_limit
+        if limit <= 0:
+            return self.cursor_default_limit
+        return min(limit, self.cursor_max_limit)
+
+    def encode_cursor(self, position):
+        """Кодирует позицию `(pub_date, id)` в строку для URL.
+
+        Args:
+            position (tuple): Дата публикации и id последнего объекта.
+
+        Returns:
+            str: Значение параметра `cursor`.
+        """
+        pub_date, pk = position
+        raw = f'{pub_date.isoformat()} {pk}'
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        """Получает позицию `(pub_date, id)` из параметра `cursor`.
+
+        Args:
+            request (Request): Текущий запрос.
+
+        Raises:
+            NotFound: Курсор не удалось разобрать.
+
+        Returns:
+            tuple | None: Позиция или None для первой страницы.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = urlsafe_b64decode(encoded.encode()).decode()
+            pub_date, pk = raw.split(' ')
+            pub_date, pk = parse_datetime(pub_date), int(pk)
+        except (DecodeError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
@@ -0,0 +1,172 @@
+"""Модуль рендереров файла со списком покупок.
+
+Рендереры используются при согласовании формата ответа
+(параметр `format` или заголовок `Accept`), а сам файл отдаётся
+потоком: строки формируются по мере чтения агрегированного запроса,
+не накапливая весь список в памяти. Исключение - PDF: документ
+целиком пишется во временный файл и отдаётся частями после этого
+(см. `ShoppingListPdfRenderer`).
+"""
+import csv
+from abc import ABC, abstractmethod
+from datetime import datetime as dt
+from os.path import exists
+from tempfile import SpooledTemporaryFile
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from rest_framework.renderers import BaseRenderer
+
+from . import conf
+
+
+class ShoppingListRenderer(ABC, BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Метод `render` используется только для ответов без файла
+    (ошибки), файл формируется генератором `stream`, который
+    определяют наследники.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return str(data).encode(self.charset)
+
+    @property
+    def content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    def get_filename(self, user):
+        return f'{user.username}_shopping_list.{self.format}'
+
+    def get_title(self, user):
+        return (
+            f'Список покупок для: {user.first_name}',
+            dt.now().strftime(conf.DATE_TIME_FORMAT),
+        )
+
+    @abstractmethod
+    def stream(self, user, ingredients):
+        """Формирует файл списка покупок по частям.
+
+        Args:
+            user (User): Владелец списка покупок.
+            ingredients (Iterator[dict]):
+                Строки с ключами `ingredient`, `measure`, `amount`.
+
+        Yields:
+            bytes: Очередная часть файла.
+        """
+
+
+class ShoppingListTxtRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, user, ingredients):
+        yield (
+            f'Список покупок для:\n\n{user.first_name}\n\n'
+            f'{dt.now().strftime(conf.DATE_TIME_FORMAT)}\n\n'
+        ).encode(self.charset)
+        for ing in ingredients:
+            yield (
+                f'{ing["ingredient"]}: {ing["amount"]} {ing["measure"]}\n'
+            ).encode(self.charset)
+        yield '\n\nПосчитано в Foodgram'.encode(self.charset)
+
+
+class Echo:
+    """Объект-буфер для `csv.writer`, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListCsvRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, user, ingredients):
+        writer = csv.writer(Echo())
+        # BOM для корректного открытия кириллицы в табличных редакторах
+        yield '\ufeff'.encode(self.charset)
+        yield writer.writerow(
+            ('Ингредиент', 'Количество', 'Единицы измерения')
+        ).encode(self.charset)
+        for ing in ingredients:
+            yield writer.writerow(
+                (ing['ingredient'], ing['amount'], ing['measure'])
+            ).encode(self.charset)
+
+
+class ShoppingListPdfRenderer(ShoppingListRenderer):
+    """Рендерер списка покупок в PDF.
+
+    PDF содержит таблицу ссылок на объекты в конце файла, поэтому
+    в отличие от txt и csv он не отдаётся по мере чтения строк:
+    документ сначала целиком пишется во временный файл (в памяти до
+    `conf.SHOP_LIST_SPOOL_SIZE` байт, дальше - на диске),
+    и только после этого отдаётся частями.
+    Для кириллицы используется TrueType-шрифт `conf.SHOP_LIST_PDF_FONT`.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name = 'ShoppingListFont'
+
+    font_size = 12
+    line_height = 7 * mm
+    margin = 20 * mm
+
+    def get_font(self):
+        if self.font_name in pdfmetrics.getRegisteredFontNames():
+            return self.font_name
+        if not exists(conf.SHOP_LIST_PDF_FONT):
+            return 'Helvetica'
+        pdfmetrics.registerFont(
+            TTFont(self.font_name, conf.SHOP_LIST_PDF_FONT)
+        )
+        return self.font_name
+
+    def stream(self, user, ingredients):
+        font = self.get_font()
+        width, height = A4
+        with SpooledTemporaryFile(max_size=conf.SHOP_LIST_SPOOL_SIZE) as file:
+            canvas = Canvas(file, pagesize=A4)
+            canvas.setFont(font, self.font_size)
+            y = height - self.margin
+            for line in self.get_lines(user, ingredients):
+                if y < self.margin:
+                    canvas.showPage()
+                    canvas.setFont(font, self.font_size)
+                    y = height - self.margin
+                canvas.drawString(self.margin, y, line)
+                y -= self.line_height
+            canvas.save()
+
+            file.seek(0)
+            while chunk := file.read(conf.SHOP_LIST_CHUNK_SIZE):
+                yield chunk
+
+    def get_lines(self, user, ingredients):
+        yield from self.get_title(user)
+        yield ''
+        for ing in ingredients:
+            yield f'{ing["ingredient"]}: {ing["amount"]} {ing["measure"]}'
+        yield ''
+        yield 'Посчитано в Foodgram'
+
+
+SHOPPING_LIST_RENDERERS = (
+    ShoppingListTxtRenderer,
+    ShoppingListCsvRenderer,
+    ShoppingListPdfRenderer,
+)
@@ -0,0 +1,133 @@
+"""Модуль поиска ингредиентов по названию.
+
+Каталог ингредиентов небольшой и почти не меняется, поэтому поиск
+выполняется по индексу в памяти процесса, без запросов к базе данных
+на каждое нажатие клавиши при автодополнении.
+Нечёткий поиск (с учётом опечаток) на PostgreSQL выполняется
+одним запросом по триграммному индексу `pg_trgm`.
+"""
+from bisect import bisect_left
+from threading import Lock
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from recipes.models import Ingredient
+
+from .cache import local_catalog_version
+
+# Символ, больший любого символа в названиях. Используется
+# как верхняя граница диапазона названий с заданным префиксом.
+MAX_CHAR = chr(0x10FFFF)
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса.
+
+    Хранит отсортированный список названий в нижнем регистре
+    и соответствующие им объекты Ingredient. Совпадения по началу
+    названия находятся двоичным поиском, совпадения в середине -
+    перебором названий. Индекс перестраивается при изменении
+    версии каталога ингредиентов (`api.cache.local_catalog_version`),
+    которую увеличивают сигналы модели Ingredient. Индекс читается
+    из основной базы, даже если настроена реплика, и строится
+    при первом запросе к процессу (`api.signals.catalogs_warm_up`).
+
+    Example:
+        ingredient_index.search('сах')
+    """
+    catalog = 'ingredients'
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.names = []
+        self.ingredients = []
+
+    def refresh(self):
+        """Перестраивает индекс, если версия каталога изменилась."""
+        version = local_catalog_version(self.catalog)
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            ingredients = sorted(
+                Ingredient.objects.using(DEFAULT_DB_ALIAS),
+                key=lambda ingredient: (ingredient.name.lower(), ingredient.id)
+            )
+            self.names, self.ingredients = (
+                [ingredient.name.lower() for ingredient in ingredients],
+                ingredients,
+            )
+            self.version = version
+
+    def search(self, name):
+        """Ищет ингредиенты по вхождению строки в название.
+
+        Args:
+            name (str): Искомая строка в нижнем регистре.
+
+        Returns:
+            list: Сначала ингредиенты, название которых начинается
+            с `name`, затем - содержащие `name` в середине.
+        """
+        self.refresh()
+        names, ingredients = self.names, self.ingredients
+        start = bisect_left(names, name)
+        end = bisect_left(names, name + MAX_CHAR, start)
+        found = ingredients[start:end]
+        found.extend(
+            ingredient
+            for ingredient_name, ingredient in zip(names, ingredients)
+            if name in ingredient_name and not ingredient_name.startswith(name)
+        )
+        return found
+
+
+ingredient_index = IngredientIndex()
+
+
+def fuzzy_search(name, limit):
+    """Нечёткий поиск ингредиентов с учётом опечаток.
+
+    На PostgreSQL выполняется один запрос: сначала ингредиенты,
+    название которых начинается с `name`, затем остальные
+    по убыванию триграммного сходства. Запрос использует
+    GIN-индекс `gin_trgm_ops` из миграции `api.0002`.
+    На других СУБД используется обычный поиск по индексу в памяти.
+
+    Args:
+        name (str): Искомая строка в нижнем регистре.
+        limit (int): Максимальное количество результатов.
+
+    Returns:
+        list: Найденные ингредиенты.
+    """
+    queryset = fuzzy_queryset(name, limit)
+    if queryset is None:
+        return ingredient_index.search(name)[:limit]
+    return list(queryset)
+
+
+def fuzzy_queryset(name, limit):
+    """Запрос нечёткого поиска ингредиентов (см. `fuzzy_search`).
+
+    Args:
+        name (str): Искомая строка в нижнем регистре.
+        limit (int): Максимальное количество результатов.
+
+    Returns:
+        QuerySet | None: Queryset или None не на PostgreSQL.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+
+    is_prefix = Q(name__startswith=name)
+    return Ingredient.objects.filter(
+        is_prefix | Q(name__contains=name) | Q(name__trigram_similar=name)
+    ).annotate(
+        is_prefix=ExpressionWrapper(is_prefix, output_field=BooleanField()),
+        similarity=TrigramSimilarity('name', name),
+    ).order_by('-is_prefix', '-similarity', 'name')[:limit]
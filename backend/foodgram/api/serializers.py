@@ -1,28 +1,51 @@
-from django.db.models import F
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.manager import BaseManager
 
-from drf_extra_fields.fields import Base64ImageField
+from foodgram.routers import REPLICA_DB_ALIAS, read_primary
 
 from recipes.models import Ingredient, Recipe, Tag
 
-from rest_framework.serializers import (ModelSerializer, SerializerMethodField,
+from rest_framework.serializers import (ListSerializer, ModelSerializer,
+                                        SerializerMethodField,
                                         ValidationError)
 
 from users.models import User
 
+from .cache import get_recipes, recipes_version, set_recipes
 from .conf import MAX_LEN_USERS_CHARFIELD, MIN_USERNAME_LENGTH
-from .services import (check_value_validate, is_hex_color,
-                       recipe_amount_ingredients_set)
+from .fields import Base64ImageField
+from .images import variant_urls
+from .services import (get_recipes_limit, is_hex_color, is_positive_int,
+                       recipe_amount_ingredients_set,
+                       recipe_amount_ingredients_update,
+                       recipe_prefetch_lookups, subscribed_ids,
+                       validate_ids)
 
 
 class ShortRecipeSerializer(ModelSerializer):
     """Сериализатор для модели Recipe.
     Определён укороченный набор полей для некоторых эндпоинтов.
     """
+    images = SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = 'id', 'name', 'image', 'cooking_time'
+        fields = 'id', 'name', 'image', 'images', 'cooking_time'
         read_only_fields = '__all__',
 
+    def get_images(self, obj):
+        """Ссылки на уменьшенные копии изображения рецепта.
+
+        Args:
+            obj (Recipe): Рецепт.
+
+        Returns:
+            dict: Ссылки по варианту и формату, пустой словарь,
+            пока копии не созданы.
+        """
+        return variant_urls(obj, self.context.get('request'))
+
 
 class UserSerializer(ModelSerializer):
     """Сериализатор для использования с моделью User.
@@ -47,7 +70,9 @@ class UserSerializer(ModelSerializer):
         """Проверка подписки пользователей.
 
         Определяет - подписан ли текущий пользователь
-        на просматриваемого пользователя.
+        на просматриваемого пользователя. Берёт аннотацию
+        `is_subscribed` (`user_annotate_subscribed`), если она есть,
+        иначе - множество подписок, загруженное один раз за запрос.
 
         Args:
             obj (User): Пользователь, на которого проверяется подписка.
@@ -55,11 +80,10 @@ class UserSerializer(ModelSerializer):
         Returns:
             bool: True, если подписка есть. Во всех остальных случаях False.
         """
-        user = self.context.get('request').user
-        return (
-            user.is_authenticated
-            and user.subscribe.filter(id=obj.id).exists()
-        )
+        subscribed = getattr(obj, 'is_subscribed', None)
+        if subscribed is not None:
+            return subscribed
+        return obj.id in subscribed_ids(self.context.get('request'))
 
     def create(self, validated_data):
         """ Создаёт нового пользователя с запрошенными полями.
@@ -108,7 +132,7 @@ class UserSerializer(ModelSerializer):
 class UserSubscribeSerializer(UserSerializer):
     """Сериализатор вывода авторов на которых подписан текущий пользователь.
     """
-    recipes = ShortRecipeSerializer(many=True, read_only=True)
+    recipes = SerializerMethodField()
     recipes_count = SerializerMethodField()
 
     class Meta:
@@ -136,6 +160,28 @@ class UserSubscribeSerializer(UserSerializer):
         """
         return True
 
+    def get_recipes(self, obj):
+        """Показывает последние рецепты автора.
+
+        Использует рецепты, предзагруженные `subscriptions_queryset`,
+        иначе загружает не более `recipes_limit` рецептов.
+
+        Args:
+            obj (User): Запрошенный пользователь.
+
+        Returns:
+            list: Рецепты автора в укороченном формате.
+        """
+        recipes = getattr(obj, 'recipes_preview', None)
+        if recipes is None:
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(self.context.get('request'))
+            if recipes_limit:
+                recipes = recipes[:recipes_limit]
+        return ShortRecipeSerializer(
+            recipes, many=True, context=self.context
+        ).data
+
     def get_recipes_count(self, obj):
         """ Показывает общее количество рецептов у каждого автора.
 
@@ -145,6 +191,9 @@ class UserSubscribeSerializer(UserSerializer):
         Returns:
             int: Количество рецептов созданных запрошенным пользователем.
         """
+        recipes_count = getattr(obj, 'recipes_count', None)
+        if recipes_count is not None:
+            return recipes_count
         return obj.recipes.count()
 
 
@@ -179,8 +228,23 @@ class IngredientSerializer(ModelSerializer):
         read_only_fields = '__all__',
 
 
+class RecipeListSerializer(ListSerializer):
+    """Сериализатор списка рецептов.
+
+    Передаёт весь список в `RecipeSerializer.to_representation_many`,
+    чтобы кэш и предзагрузка работали одним обращением на страницу.
+    """
+    def to_representation(self, data):
+        recipes = data.all() if isinstance(data, BaseManager) else data
+        return self.child.to_representation_many(list(recipes))
+
+
 class RecipeSerializer(ModelSerializer):
     """Сериализатор для рецептов.
+
+    Не зависящая от пользователя часть представления берётся из кэша
+    (`api.cache`), флаги текущего пользователя добавляются к ней
+    при каждом запросе.
     """
     tags = TagSerializer(many=True, read_only=True)
     author = UserSerializer(read_only=True)
@@ -188,6 +252,7 @@ class RecipeSerializer(ModelSerializer):
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
     image = Base64ImageField()
+    images = SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -200,6 +265,7 @@ class RecipeSerializer(ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'images',
             'text',
             'cooking_time',
         )
@@ -207,20 +273,165 @@ class RecipeSerializer(ModelSerializer):
             'is_favorite',
             'is_shopping_cart',
         )
+        list_serializer_class = RecipeListSerializer
+
+    # Поля представления, зависящие от запрашивающего пользователя
+    user_fields = ('is_favorited', 'is_in_shopping_cart')
+
+    def to_representation(self, recipe):
+        return self.to_representation_many([recipe])[0]
+
+    def to_representation_many(self, recipes):
+        """Сериализует рецепты с использованием кэша.
+
+        Для рецептов, которых нет в кэше, одним запросом на связь
+        предзагружаются тэги и ингредиенты, полученное представление
+        сохраняется в кэш без пользовательских флагов. Данные для кэша
+        читаются из основной базы (`foodgram.routers.read_primary`).
+
+        Args:
+            recipes (list): Рецепты для сериализации.
+
+        Returns:
+            list: Представления рецептов в исходном порядке.
+        """
+        version = recipes_version()
+        cached = get_recipes((recipe.id for recipe in recipes), version)
+        missed = [recipe for recipe in recipes if recipe.id not in cached]
+
+        representations = {}
+        fresh = {}
+        if missed:
+            with read_primary():
+                primary = self.primary_recipes(missed)
+                prefetch_related_objects(
+                    list(primary.values()), *recipe_prefetch_lookups()
+                )
+                for recipe in missed:
+                    if recipe.id not in primary:
+                        # удалён в основной базе, но ещё есть в реплике
+                        representations[recipe.id] = (
+                            super().to_representation(recipe)
+                        )
+                        continue
+                    fresh[recipe.id] = self.to_cache_representation(
+                        recipe,
+                        super().to_representation(primary[recipe.id]),
+                    )
+        if fresh:
+            set_recipes(fresh, version)
+            cached.update(fresh)
+
+        return [
+            representations.get(recipe.id)
+            or self.merge_user_fields(recipe, cached[recipe.id])
+            for recipe in recipes
+        ]
+
+    def primary_recipes(self, recipes):
+        """Рецепты для заполнения кэша из основной базы.
+
+        Если рецепты прочитаны из реплики, они загружаются повторно
+        одним запросом из `default`. Пользовательские флаги копий
+        не нужны и не вычисляются.
+
+        Args:
+            recipes (list): Рецепты, которых нет в кэше.
+
+        Returns:
+            dict: Рецепты по id.
+        """
+        if not any(recipe._state.db == REPLICA_DB_ALIAS for recipe in recipes):
+            return {recipe.id: recipe for recipe in recipes}
+        primary = Recipe.objects.using(DEFAULT_DB_ALIAS).select_related(
+            'author'
+        ).in_bulk([recipe.id for recipe in recipes])
+        for recipe in primary.values():
+            for field in self.user_fields:
+                setattr(recipe, field, False)
+        return primary
+
+    def to_cache_representation(self, recipe, data):
+        """Убирает из представления данные текущего запроса.
+
+        Пользовательские флаги обнуляются, а ссылка на изображение
+        сохраняется относительной, без адреса хоста из запроса.
+
+        Args:
+            recipe (Recipe): Сериализованный рецепт.
+            data (dict): Полное представление рецепта.
+
+        Returns:
+            dict: Представление для хранения в кэше.
+        """
+        data = dict(data)
+        data.update(dict.fromkeys(self.user_fields))
+        data['author'] = dict(data['author'], is_subscribed=None)
+        data['image'] = recipe.image.url if recipe.image else None
+        data['images'] = None
+        return data
+
+    def merge_user_fields(self, recipe, data):
+        """Добавляет к закэшированному представлению данные запроса.
+
+        Args:
+            recipe (Recipe): Сериализуемый рецепт.
+            data (dict): Представление рецепта из кэша.
+
+        Returns:
+            dict: Полное представление рецепта.
+        """
+        request = self.context.get('request')
+        data = dict(data)
+        data['is_favorited'] = self.get_is_favorited(recipe)
+        data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(recipe)
+        data['author'] = dict(
+            data['author'],
+            is_subscribed=self.fields['author'].get_is_subscribed(
+                recipe.author
+            ),
+        )
+        if data['image'] and request is not None:
+            data['image'] = request.build_absolute_uri(data['image'])
+        data['images'] = self.get_images(recipe)
+        return data
+
+    def get_images(self, obj):
+        """Ссылки на уменьшенные копии изображения рецепта.
+
+        Args:
+            obj (Recipe): Рецепт.
+
+        Returns:
+            dict: Ссылки по варианту и формату, пустой словарь,
+            пока копии не созданы.
+        """
+        return variant_urls(obj, self.context.get('request'))
 
     def get_ingredients(self, obj):
         """Получает список ингридиентов для рецепта.
 
+        Использует предзагруженные `RecipeViewSet` строки AmountIngredient,
+        если их нет - загружает их одним запросом.
+
         Args:
             obj (Recipe): Запрошенный рецепт.
 
         Returns:
             list: Список ингридиентов в рецепте.
         """
-        ingredients = obj.ingredients.values(
-            'id', 'name', 'measurement_unit', amount=F('recipe__amount')
-        )
-        return ingredients
+        amounts = obj.ingredient.all()
+        if 'ingredient' not in getattr(obj, '_prefetched_objects_cache', {}):
+            amounts = amounts.select_related('ingredients')
+        return [
+            {
+                'id': amount.ingredients.id,
+                'name': amount.ingredients.name,
+                'measurement_unit': amount.ingredients.measurement_unit,
+                'amount': amount.amount,
+            }
+            for amount in amounts
+        ]
 
     def get_is_favorited(self, obj):
         """Проверка - находится ли рецепт в избранном.
@@ -232,8 +443,11 @@ class RecipeSerializer(ModelSerializer):
             bool: True - если рецепт в `избранном`
             у запращивающего пользователя, иначе - False.
         """
-        user = self.context.get('request').user
+        is_favorited = getattr(obj, 'is_favorited', None)
+        if is_favorited is not None:
+            return is_favorited
 
+        user = self.context.get('request').user
         return (
             user.is_authenticated
             and user.favorites.filter(id=obj.id).exists()
@@ -249,17 +463,26 @@ class RecipeSerializer(ModelSerializer):
             bool: True - если рецепт в `списке покупок`
             у запращивающего пользователя, иначе - False.
         """
+        is_in_shopping_cart = getattr(obj, 'is_in_shopping_cart', None)
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
+
         user = self.context.get('request').user
         return user.is_authenticated and user.carts.filter(id=obj.id).exists()
 
     def validate(self, data):
         """Проверка вводных данных при создании/редактировании рецепта.
 
+        Теги и ингредиенты загружаются одним запросом на модель,
+        все найденные ошибки возвращаются вместе.
+
         Args:
             data (dict): Вводные данные.
 
         Raises:
             ValidationError: Тип данных несоответствует ожидаемому.
+            ValidationError: Некорректные, повторяющиеся
+                или несуществующие теги и ингредиенты.
 
         Returns:
             dict: Проверенные данные.
@@ -275,23 +498,43 @@ class RecipeSerializer(ModelSerializer):
                     f'"{value}" должен быть в формате "[]"'
                 )
 
-        for tag in tags:
-            check_value_validate(tag, Tag)
+        errors = {}
+        tag_objects, tag_errors = validate_ids(tags, Tag)
+        if tag_errors:
+            errors['tags'] = tag_errors
 
-        valid_ingredients = []
+        ingredient_errors = []
+        if not all(isinstance(ing, dict) for ing in ingredients):
+            ingredient_errors.append(
+                'Ингредиент передаётся в формате {"id": , "amount": }'
+            )
+            ingredients = [ing for ing in ingredients if isinstance(ing, dict)]
+        ingredient_objects, id_errors = validate_ids(
+            [ing.get('id') for ing in ingredients], Ingredient
+        )
+        ingredient_errors.extend(id_errors)
         for ing in ingredients:
-            ing_id = ing.get('id')
-            ingredient = check_value_validate(ing_id, Ingredient)
+            if not is_positive_int(ing.get('amount')):
+                ingredient_errors.append(
+                    f'{ing.get("id")} - кол-во только целое число, '
+                    'не меньше 1'
+                )
+        if ingredient_errors:
+            errors['ingredients'] = ingredient_errors
 
-            amount = ing.get('amount')
-            check_value_validate(amount)
+        if errors:
+            raise ValidationError(errors)
 
-            valid_ingredients.append(
-                {'ingredient': ingredient, 'amount': amount}
-            )
+        valid_ingredients = [
+            {
+                'ingredient': ingredient_objects[int(ing['id'])],
+                'amount': int(ing['amount']),
+            }
+            for ing in ingredients
+        ]
 
         data['name'] = name.capitalize()
-        data['tags'] = tags
+        data['tags'] = list(tag_objects.values())
         data['ingredients'] = valid_ingredients
         data['author'] = self.context.get('request').user
         return data
@@ -308,14 +551,18 @@ class RecipeSerializer(ModelSerializer):
         image = validated_data.pop('image')
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(image=image, **validated_data)
-        recipe.tags.set(tags)
-        recipe_amount_ingredients_set(recipe, ingredients)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(image=image, **validated_data)
+            recipe.tags.set(tags)
+            recipe_amount_ingredients_set(recipe, ingredients)
         return recipe
 
     def update(self, recipe, validated_data):
         """Обновляет рецепт.
 
+        Теги и ингредиенты сравниваются с записанными, в базу данных
+        вносятся только изменения.
+
         Args:
             recipe (Recipe): Рецепт для изменения.
             validated_data (dict): Изменённые данные.
@@ -335,13 +582,12 @@ class RecipeSerializer(ModelSerializer):
         recipe.cooking_time = validated_data.get(
             'cooking_time', recipe.cooking_time)
 
-        if tags:
-            recipe.tags.clear()
-            recipe.tags.set(tags)
+        with transaction.atomic():
+            if tags:
+                recipe.tags.set(tags)
 
-        if ingredients:
-            recipe.ingredients.clear()
-            recipe_amount_ingredients_set(recipe, ingredients)
+            if ingredients:
+                recipe_amount_ingredients_update(recipe, ingredients)
 
-        recipe.save()
+            recipe.save()
         return recipe
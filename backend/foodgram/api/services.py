@@ -1,18 +1,32 @@
 """Модуль вспомогательных функций.
 """
 
+from collections import Counter, defaultdict
 from string import hexdigits
 
-from recipes.models import AmountIngredient
+from django.db import connection, transaction
+from django.db.models import (BooleanField, Case, Count, Exists, F,
+                              IntegerField, OuterRef, Prefetch, Subquery, Sum,
+                              Value, When)
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import AmountIngredient, CartAmountIngredient, Recipe
 
 from rest_framework.serializers import ValidationError
 
+from users.models import User
+
+from . import conf
+from .cache import touch_popularity, touch_user_lists
+
 
 def recipe_amount_ingredients_set(recipe, ingredients):
     """Записывает ингредиенты вложенные в рецепт.
 
-    Создаёт объект AmountIngredient связывающий объекты Recipe и
-    Ingredient с указанием количества(`amount`) конкретного ингридиента.
+    Создаёт объекты AmountIngredient связывающие объекты Recipe и
+    Ingredient с указанием количества(`amount`) конкретного ингридиента
+    одним запросом.
 
     Args:
         recipe (Recipe):
@@ -20,55 +34,655 @@ def recipe_amount_ingredients_set(recipe, ingredients):
         ingridients (list):
             Список ингридентов и количества сих.
     """
-    for ingredient in ingredients:
-        AmountIngredient.objects.get_or_create(
-            recipe=recipe,
-            ingredients=ingredient['ingredient'],
-            amount=ingredient['amount']
+    AmountIngredient.objects.bulk_create(
+        AmountIngredient(recipe=recipe, ingredients_id=pk, amount=amount)
+        for pk, amount in ingredient_amounts(ingredients).items()
+    )
+
+
+def recipe_amount_ingredients_update(recipe, ingredients):
+    """Приводит ингредиенты рецепта к переданному списку.
+
+    Сравнивает новый список с записанными объектами AmountIngredient
+    и выполняет только нужные вставки, обновления и удаления.
+    Вызывается внутри транзакции.
+
+    Разница всех изменений учитывается в списках покупок одним
+    вызовом `cart_totals_recipe_changed`. Лишние строки удаляются
+    без сигнала `pre_delete`, иначе суммы менялись бы для каждой
+    строки отдельно.
+
+    Args:
+        recipe (Recipe):
+            Изменяемый рецепт.
+        ingridients (list):
+            Список ингридентов и количества сих.
+    """
+    amounts = ingredient_amounts(ingredients)
+    deltas = {}
+    changed, stale = [], []
+    for row in recipe.ingredient.all():
+        pk = row.ingredients_id
+        # ингредиент убран из рецепта или записан повторно
+        if pk not in amounts:
+            stale.append(row.id)
+            deltas[pk] = deltas.get(pk, 0) - row.amount
+            continue
+        amount = amounts.pop(pk)
+        if row.amount != amount:
+            deltas[pk] = amount - row.amount
+            row.amount = amount
+            changed.append(row)
+
+    if stale:
+        stale = AmountIngredient.objects.filter(id__in=stale)
+        stale._raw_delete(stale.db)
+    if changed:
+        AmountIngredient.objects.bulk_update(changed, ('amount',))
+    if amounts:
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(recipe=recipe, ingredients_id=pk, amount=amount)
+            for pk, amount in amounts.items()
         )
+        deltas.update(amounts)
+    cart_totals_recipe_changed(recipe.id, deltas)
 
 
-def check_value_validate(value, klass=None):
-    """Проверяет корректность переданного значения.
+def ingredient_amounts(ingredients):
+    """Приводит проверенный список ингредиентов к словарю.
 
-    Если передан класс, проверяет существует ли объект с переданным obj_id.
-    При нахождении объекта создаётся Queryset[],
-    для дальнейшей работы возвращается первое (и единственное) значение.
+    Args:
+        ingridients (list):
+            Список ингридентов и количества сих.
+
+    Returns:
+        dict: Количество по id ингредиента.
+    """
+    return {
+        ingredient['ingredient'].id: int(ingredient['amount'])
+        for ingredient in ingredients
+    }
+
+
+def recipe_amounts(recipe_ids):
+    """Суммирует количество ингредиентов в переданных рецептах.
 
     Args:
-        value (int, str):
-            Значение, переданное для проверки.
-        klass(class):
-            Если значение передано, проверяет наличие объекта с id=value.
+        recipe_ids (Iterable[int]): id рецептов.
 
     Returns:
-        None:
-            Если переданно только корректно значение.
-        obj:
-            Объект переданного класса, если дополнительно указан класс.
+        dict: Суммарное количество по id ингредиента.
+    """
+    return dict(
+        AmountIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('ingredients').annotate(Sum('amount')).order_by()
+    )
 
-    Raises:
-        ValidationError:
-            Переданное значение не является числом.
-        ValidationError:
-            Объекта с указанным id не существует.
-
-    """
-    value_str = str(value)
-    if not str(value).isdecimal():
-        raise ValidationError('Кол-во только целое число, не меньше 1')
-    elif int(value) <= 0:
-        raise ValidationError('Кол-во только целое число, не меньше 1')
-    elif not value_str.isdigit():
-        raise ValidationError('Кол-во только целое число, не меньше 1')
-
-    if klass:
-        obj = klass.objects.filter(id=value)
-        if not obj:
-            raise ValidationError(
-                f'{value} не существует'
+
+def cart_totals_apply(user_ids, deltas):
+    """Изменяет суммы ингредиентов в списках покупок на разницу.
+
+    Недостающие строки CartAmountIngredient создаются одним `INSERT`,
+    суммы всех ингредиентов меняются одним `UPDATE`, строки с нулевой
+    суммой удаляются.
+
+    Args:
+        user_ids (Iterable[int]): id владельцев списков покупок.
+        deltas (dict): Изменение количества по id ингредиента.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    user_ids = list(user_ids)
+    if not deltas or not user_ids:
+        return
+
+    totals = CartAmountIngredient.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas
+    )
+    with transaction.atomic():
+        CartAmountIngredient.objects.bulk_create(
+            [
+                CartAmountIngredient(user_id=user_id, ingredient_id=pk)
+                for user_id in user_ids
+                for pk in deltas
+            ],
+            ignore_conflicts=True,
+        )
+        totals.update(amount=F('amount') + Case(
+            *(
+                When(ingredient_id=pk, then=Value(delta))
+                for pk, delta in deltas.items()
+            ),
+            output_field=IntegerField(),
+        ))
+        totals.filter(amount__lte=0).delete()
+
+
+def cart_totals_add_recipes(user_id, recipe_ids, sign=1):
+    """Учитывает добавление (удаление) рецептов в список покупок.
+
+    Args:
+        user_id (int): id владельца списка покупок.
+        recipe_ids (Iterable[int]): id добавленных (удалённых) рецептов.
+        sign (int): 1 - рецепты добавлены, -1 - удалены.
+    """
+    cart_totals_apply((user_id,), {
+        pk: sign * amount
+        for pk, amount in recipe_amounts(recipe_ids).items()
+    })
+
+
+def cart_totals_recipe_changed(recipe_id, deltas):
+    """Учитывает изменение ингредиентов рецепта в списках покупок.
+
+    Args:
+        recipe_id (int): id изменённого рецепта.
+        deltas (dict): Изменение количества по id ингредиента.
+    """
+    if not any(deltas.values()):
+        return
+    through, owner, target, _ = user_list_field(conf.SHOP_CART_M2M)
+    cart_totals_apply(
+        through.objects.filter(**{target: recipe_id}).values_list(
+            owner, flat=True
+        ),
+        deltas,
+    )
+
+
+def cart_totals_amount_changed(old, new):
+    """Учитывает изменение строки AmountIngredient в списках покупок.
+
+    Args:
+        old (tuple | None): `(recipe_id, ingredients_id, amount)` до
+            изменения или None для новой строки.
+        new (tuple | None): То же после изменения или None
+            для удалённой строки.
+    """
+    changes = defaultdict(Counter)
+    if old is not None:
+        recipe_id, pk, amount = old
+        changes[recipe_id][pk] -= amount
+    if new is not None:
+        recipe_id, pk, amount = new
+        changes[recipe_id][pk] += amount
+    for recipe_id, deltas in changes.items():
+        cart_totals_recipe_changed(recipe_id, deltas)
+
+
+def cart_totals_live(user_ids):
+    """Считает суммы ингредиентов в списках покупок по рецептам.
+
+    Args:
+        user_ids (Iterable[int]): id владельцев списков покупок.
+
+    Returns:
+        dict: Суммарное количество по паре (id пользователя, id ингредиента).
+    """
+    rows = AmountIngredient.objects.filter(
+        recipe__cart__in=user_ids
+    ).values_list('recipe__cart', 'ingredients').annotate(
+        Sum('amount')
+    ).order_by()
+    return {(user_id, pk): amount for user_id, pk, amount in rows}
+
+
+# Счётчики объектов, которые обновляются при изменении списков
+USER_LIST_COUNTERS = {
+    conf.SUBSCRIBE_M2M: 'subscribers_count',
+    conf.FAVORITE_M2M: 'favorites_count',
+    conf.SHOP_CART_M2M: 'in_carts_count',
+}
+
+
+def user_list_field(meneger):
+    """Поле М2М списка пользователя по ключу из `conf`.
+
+    Args:
+        meneger (str): `conf.SUBSCRIBE_M2M`, `conf.FAVORITE_M2M`
+            или `conf.SHOP_CART_M2M`.
+
+    Returns:
+        tuple: Промежуточная модель, колонки владельца списка и объекта,
+        модель объектов списка.
+    """
+    field = {
+        conf.SUBSCRIBE_M2M: User.subscribe.field,
+        conf.FAVORITE_M2M: Recipe.favorite.field,
+        conf.SHOP_CART_M2M: Recipe.cart.field,
+    }[meneger]
+    through = field.remote_field.through
+    if field.model is User:
+        return (through, field.m2m_column_name(), field.m2m_reverse_name(),
+                User)
+    return (through, field.m2m_reverse_name(), field.m2m_column_name(),
+            field.model)
+
+
+def returning_supported():
+    """Выполняются ли изменения списков одним запросом с `RETURNING`.
+
+    Запросы `user_list_add` и `user_list_remove` написаны
+    для PostgreSQL, на остальных базах используется ORM.
+
+    Returns:
+        bool: True на PostgreSQL.
+    """
+    return connection.vendor == 'postgresql'
+
+
+def lock_user_lists(user_id):
+    """Блокирует строку владельца списка до конца транзакции.
+
+    Параллельные изменения списков одного пользователя выполняются
+    по очереди, поэтому проверка существующих связей и их изменение
+    не разделяются чужой записью. На базах без `SELECT ... FOR UPDATE`
+    (SQLite) запись и так выполняется по очереди.
+
+    Args:
+        user_id (int): id владельца списка.
+    """
+    list(User.objects.select_for_update().filter(id=user_id).values_list(
+        'id', flat=True
+    ))
+
+
+def user_list_add(meneger, user_id, ids):
+    """Добавляет объекты в список пользователя одним запросом.
+
+    Выполняет `INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING`:
+    несуществующие и уже добавленные объекты пропускаются.
+    На других базах, кроме PostgreSQL, - проверка и `bulk_create`
+    под блокировкой `lock_user_lists`.
+    Сигналы `m2m_changed` не отправляются.
+
+    Args:
+        meneger (str): Ключ списка из `conf`.
+        user_id (int): id владельца списка.
+        ids (list[int]): id объектов.
+
+    Returns:
+        list[int]: id добавленных объектов.
+    """
+    through, owner, target, model = user_list_field(meneger)
+    ops = connection.ops
+    qn = ops.quote_name
+    if not returning_supported():
+        with transaction.atomic():
+            lock_user_lists(user_id)
+            exists = set(through.objects.filter(
+                **{owner: user_id, f'{target}__in': ids}
+            ).values_list(target, flat=True))
+            ids = list(model.objects.filter(id__in=ids).exclude(
+                id__in=exists
+            ).values_list('id', flat=True))
+            through.objects.bulk_create(
+                through(**{owner: user_id, target: pk}) for pk in ids
             )
-        return obj[0]
+        return ids
+
+    sql = (
+        f'{ops.insert_statement(on_conflict=OnConflict.IGNORE)} '
+        f'{qn(through._meta.db_table)} ({qn(owner)}, {qn(target)}) '
+        f'SELECT %s, {qn("id")} FROM {qn(model._meta.db_table)} '
+        f'WHERE {qn("id")} IN ({", ".join(["%s"] * len(ids))}) '
+        f'{ops.on_conflict_suffix_sql([], OnConflict.IGNORE, [], [])} '
+        f'RETURNING {qn(target)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, *ids])
+        return [pk for pk, in cursor.fetchall()]
+
+
+def user_list_remove(meneger, user_id, ids):
+    """Удаляет объекты из списка пользователя одним запросом.
+
+    Выполняет `DELETE ... RETURNING`. На других базах, кроме
+    PostgreSQL, - выборка и удаление под блокировкой `lock_user_lists`.
+    Сигналы `m2m_changed` не отправляются.
+
+    Args:
+        meneger (str): Ключ списка из `conf`.
+        user_id (int): id владельца списка.
+        ids (list[int]): id объектов.
+
+    Returns:
+        list[int]: id удалённых объектов.
+    """
+    through, owner, target, _ = user_list_field(meneger)
+    rows = through.objects.filter(**{owner: user_id, f'{target}__in': ids})
+    if not returning_supported():
+        with transaction.atomic():
+            lock_user_lists(user_id)
+            ids = list(rows.values_list(target, flat=True))
+            rows.delete()
+        return ids
+
+    qn = connection.ops.quote_name
+    sql = (
+        f'DELETE FROM {qn(through._meta.db_table)} '
+        f'WHERE {qn(owner)} = %s '
+        f'AND {qn(target)} IN ({", ".join(["%s"] * len(ids))}) '
+        f'RETURNING {qn(target)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, *ids])
+        return [pk for pk, in cursor.fetchall()]
+
+
+def user_list_change(meneger, user_id, ids, add):
+    """Добавляет/удаляет объекты списка пользователя.
+
+    В той же транзакции обновляются счётчики объектов
+    (`favorites_count`, `in_carts_count`, `subscribers_count`),
+    а при изменении списка покупок - суммы ингредиентов.
+    Отметки изменения списков пользователя и популярности рецептов
+    обновляются явно, так как сигналы не отправляются.
+
+    Args:
+        meneger (str): Ключ списка из `conf`.
+        user_id (int): id владельца списка.
+        ids (list[int]): id объектов.
+        add (bool): True - добавить, False - удалить.
+
+    Returns:
+        list[int]: id добавленных (удалённых) объектов.
+    """
+    if not ids:
+        return []
+    with transaction.atomic():
+        if add:
+            changed = user_list_add(meneger, user_id, ids)
+        else:
+            changed = user_list_remove(meneger, user_id, ids)
+        if changed:
+            user_list_counter_change(meneger, changed, 1 if add else -1)
+        if changed and meneger == conf.SHOP_CART_M2M:
+            cart_totals_add_recipes(user_id, changed, sign=1 if add else -1)
+    if changed:
+        touch_user_lists(user_id)
+        if meneger == conf.FAVORITE_M2M:
+            touch_popularity()
+    return changed
+
+
+def user_list_counter_change(meneger, ids, delta):
+    """Изменяет счётчики объектов списка пользователя одним запросом.
+
+    Счётчик не опускается ниже нуля, даже если разошёлся с данными.
+
+    Args:
+        meneger (str): Ключ списка из `conf`.
+        ids (list[int]): id добавленных (удалённых) объектов.
+        delta (int): 1 - объекты добавлены, -1 - удалены.
+    """
+    _, _, _, model = user_list_field(meneger)
+    counter = USER_LIST_COUNTERS[meneger]
+    model.objects.filter(id__in=ids).update(
+        **{counter: Greatest(F(counter) + delta, 0)}
+    )
+
+
+def related_count(through, column):
+    """Подзапрос количества строк промежуточной таблицы М2М для объекта.
+
+    Args:
+        through (Model): Промежуточная модель связи.
+        column (str): Колонка с id объекта, например `recipe_id`.
+
+    Returns:
+        Coalesce: Выражение для аннотации.
+    """
+    counts = through.objects.filter(
+        **{column: OuterRef('pk')}
+    ).order_by().values(column).annotate(count=Count('*'))
+    return Coalesce(
+        Subquery(counts.values('count'), output_field=IntegerField()), 0
+    )
+
+
+def recipe_in_user_list(through, user):
+    """Подзапрос проверки наличия рецепта в списке пользователя.
+
+    Args:
+        through (Model):
+            Промежуточная модель связи Many-To-Many между Recipe и User
+            (`Recipe.favorite.through`, `Recipe.cart.through`).
+        user (User):
+            Пользователь, чей список проверяется.
+
+    Returns:
+        Exists: Коррелированный подзапрос для `annotate()` и `filter()`.
+    """
+    return Exists(
+        through.objects.filter(recipe_id=OuterRef('pk'), user_id=user.id)
+    )
+
+
+def recipe_annotate_user_flags(queryset, user):
+    """Добавляет в queryset рецептов флаги `избранного` и `покупок`.
+
+    Флаги вычисляются в том же запросе, что и список рецептов,
+    поэтому количество запросов не зависит от размера страницы.
+    Для анонимного пользователя флаги всегда `False`.
+
+    Args:
+        queryset (QuerySet): Queryset рецептов.
+        user (User): Запрашивающий пользователь.
+
+    Returns:
+        QuerySet: Queryset с аннотациями
+        `is_favorited` и `is_in_shopping_cart`.
+    """
+    if user.is_anonymous:
+        return queryset.annotate(
+            is_favorited=Value(False, output_field=BooleanField()),
+            is_in_shopping_cart=Value(False, output_field=BooleanField()),
+        )
+    return queryset.annotate(
+        is_favorited=recipe_in_user_list(Recipe.favorite.through, user),
+        is_in_shopping_cart=recipe_in_user_list(Recipe.cart.through, user),
+    )
+
+
+def user_annotate_subscribed(queryset, user):
+    """Добавляет в queryset пользователей флаг подписки.
+
+    Флаг вычисляется в том же запросе, что и список пользователей.
+    Для анонимного пользователя флаг всегда `False`.
+
+    Args:
+        queryset (QuerySet): Queryset пользователей.
+        user (User): Запрашивающий пользователь.
+
+    Returns:
+        QuerySet: Queryset с аннотацией `is_subscribed`.
+    """
+    if user.is_anonymous:
+        return queryset.annotate(
+            is_subscribed=Value(False, output_field=BooleanField())
+        )
+    through, owner, target, _ = user_list_field(conf.SUBSCRIBE_M2M)
+    return queryset.annotate(is_subscribed=Exists(
+        through.objects.filter(**{owner: user.id, target: OuterRef('pk')})
+    ))
+
+
+def subscribed_ids(request):
+    """Множество id авторов, на которых подписан пользователь запроса.
+
+    Загружается одним запросом и сохраняется в объекте запроса,
+    поэтому все сериализаторы ответа используют его повторно.
+
+    Args:
+        request (Request | None): Текущий запрос.
+
+    Returns:
+        frozenset: id авторов. Пустое для анонимного пользователя.
+    """
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    ids = getattr(request, '_subscribed_ids', None)
+    if ids is None:
+        through, owner, target, _ = user_list_field(conf.SUBSCRIBE_M2M)
+        ids = frozenset(through.objects.filter(
+            **{owner: request.user.id}
+        ).values_list(target, flat=True))
+        request._subscribed_ids = ids
+    return ids
+
+
+def recipe_prefetch_lookups():
+    """Предзагрузки, необходимые для сериализации рецепта.
+
+    Returns:
+        tuple: Объекты Prefetch для `prefetch_related()`
+        и `prefetch_related_objects()`.
+    """
+    return (
+        Prefetch('tags'),
+        Prefetch(
+            'ingredient',
+            queryset=AmountIngredient.objects.select_related(
+                'ingredients'
+            ).order_by('ingredients__name'),
+        ),
+    )
+
+
+def get_recipes_limit(request):
+    """Получает количество рецептов автора для вывода в подписках.
+
+    Args:
+        request (Request): Текущий запрос.
+
+    Returns:
+        int | None: Значение параметра `recipes_limit`, если передано
+        положительное целое число, иначе None (без ограничения).
+    """
+    limit = request.query_params.get(conf.RECIPES_LIMIT, '')
+    if limit.isdecimal() and int(limit) > 0:
+        return int(limit)
+    return None
+
+
+def get_search_limit(request, default=None):
+    """Получает ограничение количества найденных ингредиентов.
+
+    Args:
+        request (Request): Текущий запрос.
+        default (int | None): Значение, если `limit` не передан.
+
+    Returns:
+        int | None: Значение параметра `limit`, не больше
+        `conf.SEARCH_ING_MAX_LIMIT`, или `default`.
+    """
+    limit = request.query_params.get(conf.SEARCH_ING_LIMIT, '')
+    if limit.isdecimal() and int(limit) > 0:
+        return min(int(limit), conf.SEARCH_ING_MAX_LIMIT)
+    return default
+
+
+def accepts_gzip(request):
+    """Проверяет - можно ли ответить на запрос телом в gzip.
+
+    Учитываются веса `q` заголовка `Accept-Encoding`: `gzip;q=0`
+    запрещает gzip, `*` разрешает его, если gzip не указан явно.
+
+    Args:
+        request (Request): Текущий запрос.
+
+    Returns:
+        bool: True, если клиент принимает gzip.
+    """
+    qualities = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    quality = qualities.get('gzip', qualities.get('*', 0.0))
+    return quality > 0
+
+
+def subscriptions_queryset(user, recipes_limit=None):
+    """Queryset авторов, на которых подписан пользователь.
+
+    Количество рецептов автора добавляется аннотацией `recipes_count`.
+    Рецепты для предпросмотра загружаются одним запросом на страницу
+    в атрибут `recipes_preview`. При переданном ограничении Django
+    строит его через `ROW_NUMBER() OVER (PARTITION BY author_id
+    ORDER BY pub_date DESC)`.
+
+    Args:
+        user (User): Подписчик.
+        recipes_limit (int | None): Количество рецептов каждого автора.
+
+    Returns:
+        QuerySet: Queryset авторов.
+    """
+    recipes = Recipe.objects.only(
+        'id', 'name', 'image', 'image_variants', 'cooking_time', 'author'
+    ).order_by('-pub_date')
+    if recipes_limit:
+        recipes = recipes[:recipes_limit]
+    return user.subscribe.annotate(
+        recipes_count=Count('recipes')
+    ).prefetch_related(
+        Prefetch('recipes', queryset=recipes, to_attr='recipes_preview')
+    ).order_by('username')
+
+
+def is_positive_int(value):
+    """Проверяет - является ли значение целым числом не меньше 1.
+
+    Args:
+        value (int, str):
+            Значение переданное для проверки.
+
+    Returns:
+        bool: Результат проверки.
+    """
+    value = str(value)
+    return value.isdecimal() and value.isdigit() and int(value) > 0
+
+
+def validate_ids(values, klass):
+    """Проверяет список id объектов одним запросом к базе данных.
+
+    Собирает все ошибки: некорректные, повторяющиеся
+    и несуществующие id.
+
+    Args:
+        values (list):
+            Переданные id объектов.
+        klass (class):
+            Модель проверяемых объектов.
+
+    Returns:
+        tuple(dict, list): Найденные объекты по id и список ошибок.
+    """
+    errors, ids = [], []
+    for value in values:
+        if is_positive_int(value):
+            ids.append(int(value))
+        else:
+            errors.append(f'{value} - id только целое число, не меньше 1')
+
+    objects = klass.objects.in_bulk(ids)
+    duplicates = [pk for pk, count in Counter(ids).items() if count > 1]
+    missing = [pk for pk in dict.fromkeys(ids) if pk not in objects]
+    if duplicates:
+        errors.append(f'Повторяются id: {", ".join(map(str, duplicates))}')
+    if missing:
+        errors.append(f'Не существуют id: {", ".join(map(str, missing))}')
+    return objects, errors
 
 
 def is_hex_color(value):
@@ -0,0 +1,273 @@
+"""Обработчики сигналов моделей приложения `Foodgram`.
+
+Подключаются в `ApiConfig.ready()`.
+"""
+from functools import partial
+
+from django.contrib.auth.signals import user_logged_out
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from import_export.signals import post_import
+
+from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+
+from . import conf
+from .authentication import forget_tokens, forget_user_tokens
+from .cache import (invalidate_all_recipes, invalidate_catalog,
+                    invalidate_recipes, touch_popularity, touch_user_lists)
+from .images import schedule_variants
+from .search import ingredient_index
+from .services import (USER_LIST_COUNTERS, cart_totals_add_recipes,
+                       cart_totals_amount_changed, cart_totals_recipe_changed,
+                       recipe_amounts, user_list_counter_change,
+                       user_list_field)
+
+# Поля пользователя, выводимые в блоке `author` рецепта
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+def on_commit(func, *args):
+    """Вызывает `func(*args)` после фиксации текущей транзакции.
+
+    Если сбросить кэш до фиксации, параллельный запрос успеет
+    прочитать старые данные и снова положить их в кэш.
+    Вне транзакции функция вызывается сразу.
+    """
+    transaction.on_commit(partial(func, *args))
+
+
+def touch_recipes(queryset):
+    """Обновляет `updated_at` рецептов при изменении связанных данных."""
+    queryset.update(updated_at=now())
+
+
+def author_data(user):
+    """Загруженные значения полей `AUTHOR_FIELDS` без запросов к базе."""
+    return tuple(user.__dict__.get(field) for field in AUTHOR_FIELDS)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    on_commit(invalidate_recipes, instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_changed(sender, instance, **kwargs):
+    schedule_variants(instance)
+
+
+@receiver((post_save, post_delete), sender=AmountIngredient)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    on_commit(invalidate_recipes, instance.recipe_id)
+
+
+def amount_data(amount):
+    """Рецепт, ингредиент и количество строки AmountIngredient."""
+    return amount.recipe_id, amount.ingredients_id, amount.amount
+
+
+@receiver(pre_save, sender=AmountIngredient)
+def recipe_amount_saving(sender, instance, raw, **kwargs):
+    instance._saved_amount = None
+    if raw or instance._state.adding:
+        return
+    instance._saved_amount = AmountIngredient.objects.filter(
+        pk=instance.pk
+    ).values_list('recipe_id', 'ingredients_id', 'amount').first()
+
+
+@receiver(post_save, sender=AmountIngredient)
+def recipe_amount_saved(sender, instance, raw, **kwargs):
+    """Учитывает изменение ингредиента рецепта в списках покупок."""
+    if raw:
+        return
+    cart_totals_amount_changed(
+        getattr(instance, '_saved_amount', None), amount_data(instance)
+    )
+
+
+@receiver(pre_delete, sender=AmountIngredient)
+def recipe_amount_deleting(sender, instance, origin, **kwargs):
+    """Вычитает удаляемый ингредиент рецепта из списков покупок.
+
+    Учитывается только удаление самих строк. При каскадном удалении
+    вместе с рецептом суммы меняет `recipe_deleting` одним вызовом,
+    вместе с ингредиентом - удаляются строки CartAmountIngredient.
+    """
+    # `origin` - удаляемый объект или QuerySet
+    if getattr(origin, 'model', type(origin)) is AmountIngredient:
+        cart_totals_amount_changed(amount_data(instance), None)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    """Вычитает ингредиенты удаляемого рецепта из списков покупок.
+
+    Выполняется до удаления, пока рецепт ещё есть в списках покупок.
+    """
+    cart_totals_recipe_changed(instance.pk, {
+        pk: -amount
+        for pk, amount in recipe_amounts((instance.pk,)).items()
+    })
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        on_commit(invalidate_recipes, instance.pk)
+    elif pk_set:
+        on_commit(invalidate_recipes, *pk_set)
+    else:
+        on_commit(invalidate_all_recipes)
+
+
+@receiver((post_save, pre_delete), sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    touch_recipes(Recipe.objects.filter(tags=instance))
+    on_commit(invalidate_all_recipes)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_catalog_changed(sender, **kwargs):
+    on_commit(invalidate_catalog, 'tags')
+
+
+@receiver((post_save, pre_delete), sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    touch_recipes(Recipe.objects.filter(ingredients=instance))
+    on_commit(invalidate_all_recipes)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_catalog_changed(sender, **kwargs):
+    on_commit(invalidate_catalog, 'ingredients')
+
+
+@receiver(post_import)
+def catalog_imported(sender, model, **kwargs):
+    if model is Ingredient:
+        on_commit(invalidate_catalog, 'ingredients')
+    elif model is Tag:
+        on_commit(invalidate_catalog, 'tags')
+
+
+@receiver(request_started)
+def catalogs_warm_up(sender, **kwargs):
+    """Строит справочники в памяти при первом запросе к процессу."""
+    request_started.disconnect(catalogs_warm_up)
+    ingredient_index.refresh()
+
+
+@receiver(post_init, sender=User)
+def author_loaded(sender, instance, **kwargs):
+    instance._author_data = author_data(instance)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    """Сбрасывает кэш рецептов автора при изменении его данных.
+
+    Сохранения, не меняющие `AUTHOR_FIELDS` (вход, смена пароля),
+    к базе не обращаются.
+    """
+    if update_fields is not None and not set(update_fields).intersection(
+        AUTHOR_FIELDS
+    ):
+        return
+    data = getattr(instance, '_author_data', None)
+    instance._author_data = author_data(instance)
+    if created or data == instance._author_data:
+        return
+    recipe_ids = list(instance.recipes.values_list('id', flat=True))
+    if recipe_ids:
+        touch_recipes(Recipe.objects.filter(id__in=recipe_ids))
+        on_commit(invalidate_recipes, *recipe_ids)
+
+
+@receiver(post_save, sender=User)
+def user_tokens_changed(sender, instance, **kwargs):
+    """Сбрасывает кэш токенов: пароль, активность или данные изменились."""
+    forget_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    forget_tokens(instance.key)
+
+
+@receiver(user_logged_out)
+def user_logged_out_tokens(sender, user, **kwargs):
+    if user is not None:
+        forget_user_tokens(user.pk)
+
+
+@receiver(pre_delete, sender=User)
+def user_lists_counters_delete(sender, instance, **kwargs):
+    """Уменьшает счётчики объектов из списков удаляемого пользователя."""
+    for meneger in USER_LIST_COUNTERS:
+        through, owner, target, _ = user_list_field(meneger)
+        ids = list(through.objects.filter(
+            **{owner: instance.pk}
+        ).values_list(target, flat=True))
+        if ids:
+            user_list_counter_change(meneger, ids, -1)
+
+
+@receiver(m2m_changed, sender=Recipe.favorite.through)
+@receiver(m2m_changed, sender=Recipe.cart.through)
+@receiver(m2m_changed, sender=User.subscribe.through)
+def user_lists_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Учитывает изменение списков через `.add()`, `.remove()`, `.clear()`.
+
+    Обновляет счётчики объектов, суммы ингредиентов в списках покупок
+    и отметки изменения списков - так же, как `user_list_change`.
+    API меняет списки запросами без сигналов, поэтому изменения
+    не учитываются дважды. Удаляемые связи выбираются до удаления:
+    в `pk_set` при `.remove()` могут быть объекты не из списка.
+    """
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    meneger = next(
+        meneger for meneger in USER_LIST_COUNTERS
+        if user_list_field(meneger)[0] is sender
+    )
+    through, owner, target, _ = user_list_field(meneger)
+    if sender is User.subscribe.through:
+        reverse = not reverse
+    # reverse - `instance` владелец списка, иначе - объект списка
+    column, other = (owner, target) if reverse else (target, owner)
+    if action == 'post_add':
+        ids, sign = pk_set, 1
+    else:
+        rows = through.objects.filter(**{column: instance.pk})
+        if pk_set is not None:
+            rows = rows.filter(**{f'{other}__in': pk_set})
+        ids, sign = set(rows.values_list(other, flat=True)), -1
+    if not ids:
+        return
+
+    if reverse:
+        owners = (instance.pk,)
+        user_list_counter_change(meneger, ids, sign)
+    else:
+        owners = ids
+        user_list_counter_change(meneger, (instance.pk,), sign * len(ids))
+    if meneger == conf.SHOP_CART_M2M:
+        for user_id in owners:
+            cart_totals_add_recipes(
+                user_id, ids if reverse else (instance.pk,), sign
+            )
+    on_commit(touch_user_lists, *owners)
+    if meneger == conf.FAVORITE_M2M:
+        on_commit(touch_popularity)
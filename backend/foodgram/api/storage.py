@@ -0,0 +1,45 @@
+"""Хранилище изображений рецептов с адресацией по содержимому.
+
+Имя файла - хеш SHA-256 его содержимого, поэтому повторная загрузка
+того же изображения не создаёт новый файл и не пишет на диск.
+Один файл может использоваться несколькими рецептами, поэтому
+при изменении и удалении рецептов файлы не удаляются, неиспользуемые
+файлы удаляет команда `media_gc`.
+"""
+from hashlib import sha256
+from os.path import join, split, splitext
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, именующее файлы по хешу содержимого."""
+
+    def save(self, name, content, max_length=None):
+        """Сохраняет файл под именем из хеша содержимого.
+
+        Args:
+            name (str): Предлагаемое имя файла, из него берутся
+                каталог и расширение.
+            content (File): Содержимое файла.
+            max_length (int): Максимальная длина имени.
+
+        Returns:
+            str: Имя сохранённого (или уже существующего) файла.
+        """
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = split(name)
+        extension = splitext(filename)[1].lower()
+        name = join(directory, digest.hexdigest() + extension)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
@@ -0,0 +1,113 @@
+"""Общие данные тестов API.
+
+Тесты запускаются командой `python manage.py test`. Для запуска
+без PostgreSQL достаточно SQLite:
+
+    DB_ENGINE=django.db.backends.sqlite3 POSTGRES_DB=db.sqlite3 \
+    POSTGRES_USER= POSTGRES_PASSWORD= SECRET_KEY=test ALLOWED_HOSTS=* \
+    python manage.py test api
+"""
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.models import User
+
+PASSWORD = 'Kj7#pQ2m!x'
+
+
+class ApiTestCase(TestCase):
+    """Пользователи, тэги и ингредиенты для тестов API.
+
+    Файлы изображений сохраняются во временный каталог,
+    кэш очищается перед каждым тестом. Тесты выполняются в одном
+    процессе, поэтому `LocMemCache` считается общим.
+
+    Attributes:
+        author (User): Автор рецептов.
+        user (User): Пользователь со списками, авторизован в `user_client`.
+        tags (list[Tag]): Тэги.
+        ingredients (list[Ingredient]): Ингредиенты.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = mkdtemp()
+        cls.addClassCleanup(rmtree, media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=media_root, CACHE_SINGLE_PROCESS=True
+        )
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@foodgram.ru', password=PASSWORD,
+            first_name='Иван', last_name='Петров',
+        )
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@foodgram.ru', password=PASSWORD,
+            first_name='Пётр', last_name='Иванов',
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Завтрак', 'E26C2D', 'breakfast'),
+                ('Обед', '49B64E', 'dinner'),
+            )
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('абрикос', 'банан', 'вишня')
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user_client = APIClient()
+        self.user_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    @classmethod
+    def create_recipe(cls, name, amounts=(1, 2, 3), author=None):
+        """Создаёт рецепт с ингредиентами и всеми тэгами.
+
+        Args:
+            name (str): Название рецепта.
+            amounts (tuple): Количество ингредиентов `ingredients`
+                по порядку.
+            author (User | None): Автор, по умолчанию `author`.
+
+        Returns:
+            Recipe: Созданный рецепт.
+        """
+        recipe = Recipe.objects.create(
+            name=name,
+            author=author or cls.author,
+            image=ContentFile(b'image', name='recipe.png'),
+            text='Описание',
+            cooking_time=10,
+        )
+        # варианты изображения в тестах не создаются
+        recipe.image_variants = {'source': recipe.image.name, 'files': {}}
+        Recipe.objects.filter(id=recipe.id).update(
+            image_variants=recipe.image_variants
+        )
+        recipe.tags.set(cls.tags)
+        for ingredient, amount in zip(cls.ingredients, amounts):
+            AmountIngredient.objects.create(
+                recipe=recipe, ingredients=ingredient, amount=amount
+            )
+        return recipe
@@ -0,0 +1,92 @@
+from asgiref.sync import async_to_sync
+
+from django.core.cache import cache
+from django.test import AsyncClient, AsyncRequestFactory, override_settings
+from django.urls import include, path, reverse
+
+from api import urls as api_urls
+
+from .base import ApiTestCase
+
+# Маршруты API с асинхронным чтением: `api.urls` выбирает их
+# при импорте, поэтому для тестов они собраны отдельно
+urlpatterns = (
+    path('api/', include(
+        ((*api_urls.async_urlpatterns, *api_urls.urlpatterns), 'api')
+    )),
+)
+
+
+class AsyncReadViewsTests(ApiTestCase):
+    """Асинхронные представления отвечают так же, как синхронные."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe('Каша')
+        cls.create_recipe('Суп', amounts=(4, 5, 6))
+        cls.user.favorites.add(cls.recipe)
+        cls.urls = (
+            reverse('api:recipes-list'),
+            reverse('api:recipes-detail', args=(cls.recipe.id,)),
+            reverse('api:tags-list'),
+            reverse('api:ingredients-list'),
+        )
+
+    def get_sync(self, url, headers):
+        response = self.client.get(url, headers=headers)
+        return response.status_code, response.json(), response.get('ETag')
+
+    @override_settings(
+        ASYNC_READ_VIEWS=True, ROOT_URLCONF='api.tests.test_async_views'
+    )
+    def get_async(self, url, headers):
+        response = async_to_sync(self.async_get)(url, headers)
+        # запрос обработан представлением `async_read_view`, не роутером
+        self.assertFalse(hasattr(response.resolver_match.func, 'cls'))
+        return response.status_code, response.json(), response.get('ETag')
+
+    async def async_get(self, url, headers):
+        return await AsyncClient().get(url, headers=headers)
+
+    def assert_same(self, headers):
+        for url in self.urls:
+            with self.subTest(url=url):
+                expected = self.get_sync(url, headers)
+                # асинхронное представление заполняет кэш само
+                cache.clear()
+                self.assertEqual(self.get_async(url, headers), expected)
+
+    def test_anonymous(self):
+        self.assert_same({})
+
+    def test_token(self):
+        self.assert_same({'Authorization': f'Token {self.token.key}'})
+
+    def test_invalid_token(self):
+        for value in ('Token', 'Token a b', 'Token wrong'):
+            with self.subTest(value=value):
+                self.assert_same({'Authorization': value})
+
+    def test_token_cached(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        url = self.urls[1]
+        expected = self.get_sync(url, headers)
+        self.assertTrue(expected[1]['is_favorited'])
+        # токен уже в кэше, пользователь берётся из него
+        self.assertEqual(self.get_async(url, headers), expected)
+
+    def test_invalid_pk(self):
+        url = reverse('api:recipes-detail', args=('abc',))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        # маршрут `<int:pk>` такой адрес не принимает, поэтому
+        # асинхронное представление вызывается напрямую
+        view = api_urls.async_urlpatterns[3].callback
+        async_response = async_to_sync(view)(
+            AsyncRequestFactory().get(url), pk='abc'
+        )
+        self.assertEqual(async_response.status_code, 404)
+        self.assertEqual(
+            async_response.render().content, response.content
+        )
@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from api.authentication import local_tokens, token_cache_key
+
+from .base import ApiTestCase
+
+
+class CachedTokenAuthenticationTests(ApiTestCase):
+    """Кэш токенов хранит только токен, id и активность пользователя."""
+
+    def setUp(self):
+        super().setUp()
+        local_tokens.clear()
+        self.key = token_cache_key(self.token.key)
+        self.url = reverse('api:users-me')
+
+    def test_cached_data(self):
+        response = self.user_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], self.user.username)
+        expected = (self.token.key, self.user.id, True)
+        self.assertEqual(cache.get(self.key), expected)
+        self.assertEqual(local_tokens.get(self.key), expected)
+
+    def test_no_queries_for_cached_token(self):
+        self.user_client.get(self.url)
+        local_tokens.clear()
+        # токен берётся из общего кэша, запрос - только список подписок
+        with self.assertNumQueries(1):
+            response = self.user_client.get(
+                reverse('api:users-subscriptions')
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_inactive_user(self):
+        self.user_client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.user_client.get(self.url).status_code, 401)
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache(self):
+        response = self.user_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(self.key))
+        self.assertIsNotNone(local_tokens.get(self.key))
@@ -0,0 +1,98 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from api.cache import get_recipes, recipes_version
+
+from .base import ApiTestCase
+
+
+class RecipeCacheInvalidationTests(ApiTestCase):
+    """Кэш представлений рецептов сбрасывается после изменения данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe('Каша')
+        cls.url = reverse('api:recipes-detail', args=(cls.recipe.id,))
+
+    def is_cached(self):
+        return self.recipe.id in get_recipes(
+            (self.recipe.id,), recipes_version()
+        )
+
+    def get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.is_cached())
+        return response.data
+
+    def test_recipe_update(self):
+        self.get()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.recipe.name = 'Суп'
+            self.recipe.save()
+        # до фиксации транзакции кэш не сбрасывается
+        self.assertTrue(self.is_cached())
+        for callback in callbacks:
+            callback()
+        self.assertFalse(self.is_cached())
+        self.assertEqual(self.get()['name'], 'Суп')
+
+    def test_recipe_update_through_api(self):
+        self.get()
+        author_client = APIClient()
+        author_client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = author_client.patch(self.url, {
+                'name': 'суп',
+                'text': 'Новое описание',
+                'tags': [self.tags[0].id],
+                'ingredients': [{'id': self.ingredients[0].id, 'amount': 5}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        data = self.get()
+        self.assertEqual(data['name'], 'Суп')
+        self.assertEqual(data['text'], 'Новое описание')
+        self.assertEqual([tag['id'] for tag in data['tags']],
+                         [self.tags[0].id])
+        self.assertEqual(
+            [(ing['id'], ing['amount']) for ing in data['ingredients']],
+            [(self.ingredients[0].id, 5)],
+        )
+
+    def test_tag_update(self):
+        self.get()
+        tag = self.tags[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'Ужин'
+            tag.save()
+        self.assertIn('Ужин', [tag['name'] for tag in self.get()['tags']])
+
+    def test_author_update(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Семён'
+            self.author.save()
+        self.assertEqual(self.get()['author']['first_name'], 'Семён')
+
+    def test_author_save_without_changes(self):
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.author.save(update_fields=('last_login',))
+                self.author.save()
+        self.assertFalse(any(
+            'recipes_recipe' in query['sql'] for query in queries
+        ))
+        self.assertTrue(self.is_cached())
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache_bypassed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        with override_settings(CACHE_SINGLE_PROCESS=True):
+            self.assertFalse(self.is_cached())
@@ -0,0 +1,152 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from recipes.models import AmountIngredient, CartAmountIngredient, Ingredient
+
+from rest_framework.test import APIClient
+
+from api.services import cart_totals_live
+
+from .base import ApiTestCase
+
+
+class CartTotalsTests(ApiTestCase):
+    """Суммы ингредиентов в списке покупок совпадают с рецептами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.soup = cls.create_recipe('Суп', amounts=(1, 2, 3))
+        cls.salad = cls.create_recipe('Салат', amounts=(10, 20))
+
+    def cart(self, recipe):
+        return reverse('api:recipes-shopping-cart', args=(recipe.id,))
+
+    def totals(self):
+        """Суммы пользователя `user` по id ингредиента."""
+        totals = dict(CartAmountIngredient.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'amount'))
+        live = {
+            pk: amount
+            for (user_id, pk), amount in cart_totals_live(
+                (self.user.id,)
+            ).items()
+        }
+        self.assertEqual(totals, live)
+        return totals
+
+    def expected(self, *amounts):
+        return {
+            ingredient.id: amount
+            for ingredient, amount in zip(self.ingredients, amounts)
+            if amount
+        }
+
+    def test_add_and_remove(self):
+        self.assertEqual(self.totals(), {})
+        self.user_client.post(self.cart(self.soup))
+        self.assertEqual(self.totals(), self.expected(1, 2, 3))
+        self.user_client.post(self.cart(self.salad))
+        self.assertEqual(self.totals(), self.expected(11, 22, 3))
+        # повторное добавление ничего не меняет
+        response = self.user_client.post(self.cart(self.salad))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.totals(), self.expected(11, 22, 3))
+        self.user_client.delete(self.cart(self.soup))
+        self.assertEqual(self.totals(), self.expected(10, 20))
+        self.user_client.delete(self.cart(self.salad))
+        self.assertEqual(self.totals(), {})
+
+    def test_batch(self):
+        url = reverse('api:recipes-shopping-cart-batch')
+        ids = {'ids': [self.soup.id, self.salad.id]}
+        self.user_client.post(url, ids, format='json')
+        self.assertEqual(self.totals(), self.expected(11, 22, 3))
+        self.user_client.delete(url, ids, format='json')
+        self.assertEqual(self.totals(), {})
+
+    def test_recipe_edit_through_api(self):
+        self.user_client.post(self.cart(self.soup))
+        self.user_client.post(self.cart(self.salad))
+        author_client = APIClient()
+        author_client.force_authenticate(self.author)
+        response = author_client.patch(
+            reverse('api:recipes-detail', args=(self.soup.id,)),
+            {
+                'name': 'Суп',
+                'text': 'Описание',
+                'tags': [self.tags[0].id],
+                # первый изменён, второй удалён, третий без изменений
+                'ingredients': [
+                    {'id': self.ingredients[0].id, 'amount': 5},
+                    {'id': self.ingredients[2].id, 'amount': 3},
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.totals(), self.expected(15, 20, 3))
+
+    def test_recipe_edit_through_models(self):
+        self.user_client.post(self.cart(self.soup))
+        row = AmountIngredient.objects.get(
+            recipe=self.soup, ingredients=self.ingredients[1]
+        )
+        row.amount = 7
+        row.save()
+        self.assertEqual(self.totals(), self.expected(1, 7, 3))
+        pear = Ingredient.objects.create(name='груша', measurement_unit='г')
+        row.ingredients = pear
+        row.save()
+        self.assertEqual(
+            self.totals(), {**self.expected(1, 0, 3), pear.id: 7}
+        )
+        row.delete()
+        self.assertEqual(self.totals(), self.expected(1, 0, 3))
+        AmountIngredient.objects.create(
+            recipe=self.soup, ingredients=self.ingredients[1], amount=4
+        )
+        self.assertEqual(self.totals(), self.expected(1, 4, 3))
+
+    def test_recipe_delete(self):
+        self.user_client.post(self.cart(self.soup))
+        self.user_client.post(self.cart(self.salad))
+        self.soup.delete()
+        self.assertEqual(self.totals(), self.expected(10, 20))
+
+    def test_recipe_delete_with_author(self):
+        self.user_client.post(self.cart(self.soup))
+        self.user_client.post(self.cart(self.salad))
+        self.author.delete()
+        self.assertEqual(self.totals(), {})
+
+    def test_recipe_replace_queries(self):
+        """Замена всех ингредиентов не зависит от их количества."""
+        self.user_client.post(self.cart(self.soup))
+        author_client = APIClient()
+        author_client.force_authenticate(self.author)
+        url = reverse('api:recipes-detail', args=(self.soup.id,))
+        for count in (3, 30):
+            ingredients = Ingredient.objects.bulk_create(
+                Ingredient(name=f'{count}-{i}', measurement_unit='г')
+                for i in range(count)
+            )
+            data = {
+                'name': 'Суп',
+                'text': 'Описание',
+                'tags': [tag.id for tag in self.tags],
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 2}
+                    for ingredient in ingredients
+                ],
+            }
+            # кэш рецепта сбрасывается после фиксации транзакции
+            cache.clear()
+            with self.subTest(count=count), self.assertNumQueries(19):
+                response = author_client.patch(url, data, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                self.totals(),
+                {ingredient.id: 2 for ingredient in ingredients},
+            )
@@ -0,0 +1,42 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from .base import ApiTestCase
+
+
+class ConditionalGetTests(ApiTestCase):
+    """ETag ответов со списком и рецептом."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe('Каша')
+        cls.urls = (
+            reverse('api:recipes-list'),
+            reverse('api:recipes-detail', args=(cls.recipe.id,)),
+        )
+
+    def test_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.user_client.get(url)['ETag']
+                response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_user_lists_change(self):
+        etags = [self.user_client.get(url)['ETag'] for url in self.urls]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.favorites.add(self.recipe)
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.user_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('ETag', response)
@@ -0,0 +1,52 @@
+import struct
+import zlib
+from base64 import b64encode, encodebytes
+from io import BytesIO
+
+from django.test import SimpleTestCase
+
+from PIL import Image
+
+from rest_framework.exceptions import ValidationError
+
+from api.fields import Base64ImageField
+
+
+def png_chunk(kind, data=b''):
+    chunk = kind + data
+    return (
+        struct.pack('>I', len(data)) + chunk
+        + struct.pack('>I', zlib.crc32(chunk))
+    )
+
+
+def png_header(width, height):
+    """PNG без данных изображения с указанными размерами."""
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + png_chunk(
+            b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+        )
+        + png_chunk(b'IEND')
+    )
+
+
+class Base64ImageFieldTests(SimpleTestCase):
+    """Декодирование и проверка изображений в base64."""
+
+    def setUp(self):
+        self.field = Base64ImageField()
+
+    def test_image(self):
+        image = BytesIO()
+        Image.new('RGB', (4, 3)).save(image, 'PNG')
+        data = encodebytes(image.getvalue()).decode()
+        file = self.field.to_internal_value(f'data:image/png;base64,{data}')
+        self.assertEqual(file.name, 'image.png')
+        self.assertEqual(file.read(), image.getvalue())
+
+    def test_decompression_bomb(self):
+        data = b64encode(png_header(30000, 30000)).decode()
+        with self.assertRaises(ValidationError) as context:
+            self.field.to_internal_value(data)
+        self.assertEqual(context.exception.detail[0].code, 'dimensions')
@@ -0,0 +1,77 @@
+from django.urls import reverse
+from django.utils.timezone import now
+
+from recipes.models import Recipe
+
+from api import conf
+
+from .base import ApiTestCase
+
+RECIPES_URL = reverse('api:recipes-list')
+
+
+class RecipeCursorPaginationTests(ApiTestCase):
+    """Курсор рецептов: порядок `(pub_date, id)` и границы страниц."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [cls.create_recipe(f'Рецепт {i}') for i in range(7)]
+        # у части рецептов одинаковая дата - порядок задаёт id
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in cls.recipes[2:5]]
+        ).update(pub_date=now())
+        cls.expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))
+
+    def walk(self, limit):
+        """Проходит все страницы курсора, возвращает id по страницам."""
+        pages = []
+        url = f'{RECIPES_URL}?{conf.CURSOR}=&{conf.PAGE_LIMIT}={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            pages.append([recipe['id'] for recipe in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_pages_cover_all_recipes_in_order(self):
+        for limit in (1, 2, 3, 6):
+            with self.subTest(limit=limit):
+                pages = self.walk(limit)
+                self.assertEqual(sum(pages, []), self.expected)
+                self.assertTrue(all(len(page) <= limit for page in pages))
+
+    def test_last_full_page_has_no_next(self):
+        pages = self.walk(7)
+        self.assertEqual(pages, [self.expected])
+
+    def test_limit_above_total(self):
+        self.assertEqual(self.walk(50), [self.expected])
+
+    def test_limit_is_bounded(self):
+        response = self.client.get(
+            RECIPES_URL,
+            {conf.CURSOR: '', conf.PAGE_LIMIT: conf.CURSOR_MAX_LIMIT + 1},
+        )
+        self.assertEqual(len(response.data['results']), 7)
+        response = self.client.get(
+            RECIPES_URL, {conf.CURSOR: '', conf.PAGE_LIMIT: 0}
+        )
+        self.assertEqual(
+            len(response.data['results']), conf.CURSOR_DEFAULT_LIMIT
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'MjAyMw==', 'eCB5'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(RECIPES_URL, {conf.CURSOR: cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_without_cursor_pages_by_number(self):
+        response = self.client.get(RECIPES_URL, {conf.PAGE_LIMIT: 3})
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
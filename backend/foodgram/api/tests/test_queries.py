@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from api import conf
+from api.signals import catalogs_warm_up
+
+from .base import PASSWORD, ApiTestCase
+
+# Размеры страниц: количество запросов от них не зависит
+PAGE_LIMITS = (2, 5)
+
+
+class QueriesTestCase(ApiTestCase):
+    """Авторы с рецептами в списках пользователя `user`.
+
+    Attributes:
+        authors (list[User]): Авторы, на которых подписан `user`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@foodgram.ru',
+                password=PASSWORD, first_name='Автор', last_name=str(i),
+            )
+            for i in range(6)
+        ]
+        for author in cls.authors:
+            for i in range(3):
+                recipe = cls.create_recipe(
+                    f'{author.username} {i}', author=author
+                )
+                cls.user.favorites.add(recipe)
+                cls.user.carts.add(recipe)
+        cls.user.subscribe.add(*cls.authors)
+
+    def setUp(self):
+        super().setUp()
+        # справочники строятся при первом запросе к процессу
+        request_started.disconnect(catalogs_warm_up)
+        self.auth_client = APIClient()
+        self.auth_client.force_authenticate(self.user)
+
+    def assert_queries(self, client, url, num, **params):
+        """Проверяет количество запросов для всех `PAGE_LIMITS`."""
+        for limit in PAGE_LIMITS:
+            with self.subTest(url=url, limit=limit):
+                cache.clear()
+                with self.assertNumQueries(num):
+                    response = client.get(
+                        url, {conf.PAGE_LIMIT: limit, **params}
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), limit)
+
+
+class RecipeListQueriesTests(QueriesTestCase):
+    """Количество запросов списка рецептов."""
+
+    url = reverse('api:recipes-list')
+
+    def test_authenticated(self):
+        # ETag, count, рецепты с флагами пользователя, тэги,
+        # ингредиенты, подписки пользователя
+        self.assert_queries(self.auth_client, self.url, 6)
+        response = self.auth_client.get(self.url, {conf.PAGE_LIMIT: 5})
+        self.assertTrue(all(
+            recipe['is_favorited'] and recipe['is_in_shopping_cart']
+            for recipe in response.data['results']
+        ))
+
+    def test_anonymous(self):
+        # ETag, count, рецепты, тэги и ингредиенты одним запросом каждые
+        self.assert_queries(self.client, self.url, 5)
+
+    def test_cached(self):
+        for limit in PAGE_LIMITS:
+            self.client.get(self.url, {conf.PAGE_LIMIT: limit})
+            # представления из кэша: тэги и ингредиенты не загружаются
+            with self.subTest(limit=limit), self.assertNumQueries(3):
+                self.client.get(self.url, {conf.PAGE_LIMIT: limit})
+
+
+class UserListQueriesTests(QueriesTestCase):
+    """Количество запросов списков пользователей и подписок."""
+
+    def test_users(self):
+        # count и пользователи с флагом `is_subscribed`
+        url = reverse('api:users-list')
+        for client in (self.client, self.auth_client):
+            self.assert_queries(client, url, 2)
+
+    def test_subscriptions(self):
+        # count, авторы и их рецепты с ограничением `recipes_limit`
+        url = reverse('api:users-subscriptions')
+        for recipes_limit in (1, 3):
+            self.assert_queries(
+                self.auth_client, url, 3,
+                **{conf.RECIPES_LIMIT: recipes_limit},
+            )
+            response = self.auth_client.get(url, {
+                conf.PAGE_LIMIT: 2, conf.RECIPES_LIMIT: recipes_limit,
+            })
+            self.assertTrue(all(
+                author['is_subscribed']
+                and len(author['recipes']) == recipes_limit
+                for author in response.data['results']
+            ))
@@ -0,0 +1,187 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from recipes.models import CartAmountIngredient, Recipe
+
+from users.models import User
+
+from api import conf
+
+from .base import PASSWORD, ApiTestCase
+
+
+class BatchUserListTests(ApiTestCase):
+    """Пакетное добавление и удаление рецептов в списках идемпотентно."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [cls.create_recipe(f'Рецепт {i}') for i in range(3)]
+        cls.ids = sorted(recipe.id for recipe in cls.recipes)
+
+    def batch(self, meneger, method, ids):
+        url = reverse(f'api:recipes-{meneger.replace("_", "-")}-batch')
+        return getattr(self.user_client, method)(
+            url, {'ids': ids}, format='json'
+        )
+
+    def listed(self, meneger):
+        recipes = {
+            conf.FAVORITE_M2M: self.user.favorites,
+            conf.SHOP_CART_M2M: self.user.carts,
+        }[meneger]
+        return sorted(recipes.values_list('id', flat=True))
+
+    def test_add_and_remove_twice(self):
+        for meneger in (conf.FAVORITE_M2M, conf.SHOP_CART_M2M):
+            with self.subTest(meneger=meneger):
+                response = self.batch(meneger, 'post', self.ids[:2])
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['ids'], self.ids[:2])
+
+                response = self.batch(meneger, 'post', self.ids)
+                self.assertEqual(response.data['ids'], self.ids[2:])
+                response = self.batch(meneger, 'post', self.ids)
+                self.assertEqual(response.data['ids'], [])
+                self.assertEqual(self.listed(meneger), self.ids)
+
+                response = self.batch(meneger, 'delete', self.ids[:1])
+                self.assertEqual(response.data['ids'], self.ids[:1])
+                response = self.batch(meneger, 'delete', self.ids)
+                self.assertEqual(response.data['ids'], self.ids[1:])
+                response = self.batch(meneger, 'delete', self.ids)
+                self.assertEqual(response.data['ids'], [])
+                self.assertEqual(self.listed(meneger), [])
+
+    def test_counters_follow_changes_only(self):
+        self.batch(conf.FAVORITE_M2M, 'post', self.ids)
+        self.batch(conf.FAVORITE_M2M, 'post', self.ids)
+        self.assertEqual(
+            set(Recipe.objects.values_list('favorites_count', flat=True)),
+            {1},
+        )
+        self.batch(conf.FAVORITE_M2M, 'delete', self.ids)
+        self.batch(conf.FAVORITE_M2M, 'delete', self.ids)
+        self.assertEqual(
+            set(Recipe.objects.values_list('favorites_count', flat=True)),
+            {0},
+        )
+
+    def test_invalid_ids(self):
+        missing = self.ids[-1] + 100
+        for ids in ([], [self.ids[0], self.ids[0]], [missing], ['a'], None):
+            with self.subTest(ids=ids):
+                response = self.batch(conf.FAVORITE_M2M, 'post', ids)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.listed(conf.FAVORITE_M2M), [])
+
+    def test_anonymous(self):
+        response = self.client.post(
+            reverse('api:recipes-favorite-batch'),
+            {'ids': self.ids}, format='json',
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class UserListCountersTests(ApiTestCase):
+    """Счётчики объектов списков при изменении через API и модели."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [cls.create_recipe(f'Рецепт {i}') for i in range(2)]
+        cls.follower = User.objects.create_user(
+            username='follower', email='follower@foodgram.ru',
+            password=PASSWORD,
+        )
+
+    def counters(self, field):
+        return dict(Recipe.objects.values_list('id', field))
+
+    def assert_counters_are_live(self):
+        out = StringIO()
+        call_command('recount_counters', stdout=out)
+        self.assertNotRegex(out.getvalue(), r'исправлено [1-9]')
+
+    def test_api(self):
+        recipe = self.recipes[0]
+        for action in ('favorite', 'shopping-cart'):
+            url = reverse(f'api:recipes-{action}', args=(recipe.id,))
+            self.user_client.post(url)
+            self.user_client.post(url)
+        subscribe = reverse('api:users-subscribe', args=(self.author.id,))
+        self.user_client.post(subscribe)
+        recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(
+            (recipe.favorites_count, recipe.in_carts_count), (1, 1)
+        )
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assert_counters_are_live()
+
+        self.user_client.delete(subscribe)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
+
+    def test_forward_and_reverse_managers(self):
+        first, second = self.recipes
+        self.user.favorites.add(first, second)
+        first.favorite.add(self.follower)
+        self.assertEqual(
+            self.counters('favorites_count'), {first.id: 2, second.id: 1}
+        )
+        # удаление отсутствующей связи не меняет счётчик
+        second.favorite.remove(self.user, self.follower)
+        self.follower.favorites.remove(second)
+        self.assertEqual(
+            self.counters('favorites_count'), {first.id: 2, second.id: 0}
+        )
+        first.favorite.clear()
+        self.assertEqual(
+            self.counters('favorites_count'), {first.id: 0, second.id: 0}
+        )
+        self.assert_counters_are_live()
+
+    def test_cart_set_and_clear(self):
+        first, second = self.recipes
+        self.user.carts.set((first, second))
+        first.cart.add(self.follower)
+        self.assertEqual(
+            self.counters('in_carts_count'), {first.id: 2, second.id: 1}
+        )
+        self.assertEqual(
+            dict(CartAmountIngredient.objects.filter(
+                user=self.user
+            ).values_list('ingredient_id', 'amount')),
+            {ingredient.id: amount * 2 for ingredient, amount in zip(
+                self.ingredients, (1, 2, 3)
+            )},
+        )
+        self.user.carts.set((second,))
+        self.follower.carts.clear()
+        self.assertEqual(
+            self.counters('in_carts_count'), {first.id: 0, second.id: 1}
+        )
+        self.assertFalse(CartAmountIngredient.objects.filter(
+            user=self.follower
+        ).exists())
+        self.assert_counters_are_live()
+
+    def test_subscriptions(self):
+        self.user.subscribe.add(self.author)
+        self.author.subscribers.add(self.follower)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 2)
+        self.user.subscribe.clear()
+        self.author.subscribers.remove(self.follower, self.user)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
+
+    def test_user_delete(self):
+        self.user.favorites.add(*self.recipes)
+        self.user.delete()
+        self.assertEqual(
+            set(self.counters('favorites_count').values()), {0}
+        )
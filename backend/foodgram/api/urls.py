@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
+from .async_views import async_read_view
 from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
 
 app_name = 'api'
@@ -12,7 +14,36 @@ router.register('ingredients', IngredientViewSet, 'ingredients')
 router.register('recipes', RecipeViewSet, 'recipes')
 router.register('users', UserViewSet, 'users')
 
+# Асинхронное чтение (ASGI) перекрывает маршруты роутера,
+# запись по тем же адресам выполняют синхронные ViewSet
+async_urlpatterns = (
+    path('tags/', async_read_view(
+        TagViewSet, {'get': 'list'}, {'get': 'alist'},
+        basename='tags', detail=False,
+    )),
+    path('ingredients/', async_read_view(
+        IngredientViewSet, {'get': 'list'}, {'get': 'alist'},
+        basename='ingredients', detail=False,
+    )),
+    path('recipes/', async_read_view(
+        RecipeViewSet, {'get': 'list', 'post': 'create'}, {'get': 'alist'},
+        basename='recipes', detail=False,
+    )),
+    path('recipes/<int:pk>/', async_read_view(
+        RecipeViewSet,
+        {
+            'get': 'retrieve',
+            'put': 'update',
+            'patch': 'partial_update',
+            'delete': 'destroy',
+        },
+        {'get': 'aretrieve'},
+        basename='recipes', detail=True,
+    )),
+)
+
 urlpatterns = (
+    *(async_urlpatterns if settings.ASYNC_READ_VIEWS else ()),
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 )
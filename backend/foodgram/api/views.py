@@ -1,26 +1,38 @@
-from datetime import datetime as dt
 from urllib.parse import unquote
 
-from django.db.models import F, Sum
-from django.http.response import HttpResponse
+from asgiref.sync import sync_to_async
+
+from django.db.models import F
+from django.http.response import StreamingHttpResponse
+
+from django_filters.rest_framework import DjangoFilterBackend
 
 from djoser.views import UserViewSet as DjoserUserViewSet
 
-from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+from recipes.models import Ingredient, Recipe, Tag
 
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
 from . import conf
-from .mixins import AddDelViewMixin
-from .paginators import PageLimitPagination
+from .cache import popularity_stamp
+from .export import export_recipes, gzip_stream, ndjson_lines
+from .filters import RecipeFilter
+from .mixins import (AddDelViewMixin, AsyncReadMixin, ConditionalGetMixin,
+                     RenderedCatalogMixin, serializer_data)
+from .paginators import PageLimitPagination, RecipePagination
 from .permissions import AdminOrReadOnly, AuthorStaffOrReadOnly
+from .renderers import SHOPPING_LIST_RENDERERS
+from .search import fuzzy_queryset, fuzzy_search, ingredient_index
 from .serializers import (IngredientSerializer, RecipeSerializer,
                           ShortRecipeSerializer, TagSerializer,
                           UserSubscribeSerializer)
-from .services import incorrect_layout
+from .services import (get_recipes_limit, get_search_limit, incorrect_layout,
+                       recipe_annotate_user_flags, subscriptions_queryset,
+                       user_annotate_subscribed)
 
 
 class UserViewSet(DjoserUserViewSet, AddDelViewMixin):
@@ -34,6 +46,16 @@ class UserViewSet(DjoserUserViewSet, AddDelViewMixin):
     pagination_class = PageLimitPagination
     add_serializer = UserSubscribeSerializer
 
+    def get_queryset(self):
+        """Пользователи с флагом подписки текущего пользователя.
+
+        Returns:
+            QuerySet: Queryset с аннотацией `is_subscribed`.
+        """
+        return user_annotate_subscribed(
+            super().get_queryset(), self.request.user
+        )
+
     @action(methods=conf.ACTION_METHODS, detail=True)
     def subscribe(self, request, id):
         """Создаёт/удалет связь между пользователями.
@@ -56,6 +78,8 @@ class UserViewSet(DjoserUserViewSet, AddDelViewMixin):
         """Список подписок пользоваетеля.
 
         Вызов метода через url: */user/<int:id>/subscribtions/.
+        Количество рецептов каждого автора ограничивается
+        параметром `recipes_limit`.
 
         Args:
             request (Request): Не используется.
@@ -68,38 +92,51 @@ class UserViewSet(DjoserUserViewSet, AddDelViewMixin):
         user = self.request.user
         if user.is_anonymous:
             return Response(status=HTTP_401_UNAUTHORIZED)
-        authors = user.subscribe.all()
+        authors = subscriptions_queryset(user, get_recipes_limit(request))
         pages = self.paginate_queryset(authors)
         serializer = UserSubscribeSerializer(
-            pages, many=True, context={'request': request}
+            authors if pages is None else pages,
+            many=True,
+            context={'request': request},
         )
+        if pages is None:
+            return Response(serializer.data)
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(RenderedCatalogMixin, AsyncReadMixin, ReadOnlyModelViewSet):
     """Работает с тэгами.
 
     Изменение и создание тэгов разрешено только админам.
+    Полный список отдаётся из готового ответа в памяти.
     """
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AdminOrReadOnly,)
+    catalog = 'tags'
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(RenderedCatalogMixin, AsyncReadMixin,
+                        ReadOnlyModelViewSet):
     """Работет с игридиентами.
 
     Изменение и создание ингридиентов разрешено только админам.
+    Полный список (без поиска) отдаётся из готового ответа в памяти.
     """
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AdminOrReadOnly,)
+    catalog = 'ingredients'
 
     def get_queryset(self):
         """Получает queryset в соответствии с параметрами запроса.
 
         Реализован поиск объектов по совпадению в начале названия,
         также добавляются результаты по совпадению в середине.
+        Поиск выполняется по индексу в памяти процесса (`api.search`).
+        С параметром `mode=fuzzy` выполняется нечёткий поиск с учётом
+        опечаток (на PostgreSQL). Параметр `limit` ограничивает
+        количество результатов.
         При наборе названия в неправильной раскладке - латинские символы
         преобразуются в кириллицу (для стандартной раскладки).
         Также прописные буквы преобразуются в строчные,
@@ -107,32 +144,68 @@ class IngredientViewSet(ReadOnlyModelViewSet):
 
         Returns:
             QuerySet: Список запрошенных объектов.
+        """
+        search = self.get_search_params()
+        if search is None:
+            return self.queryset
+        name, fuzzy, limit = search
+        if fuzzy:
+            return fuzzy_search(name, limit)
+        return ingredient_index.search(name)[:limit]
+
+    async def alist(self, request, *args, **kwargs):
+        """Асинхронный `list`.
+
+        Нечёткий поиск на PostgreSQL выполняется асинхронным ORM,
+        поиск по индексу в памяти - в потоке, так как при изменении
+        каталога индекс перестраивается запросом к базе.
+        """
+        search = self.get_search_params()
+        if search is None:
+            return await super().alist(request, *args, **kwargs)
+        name, fuzzy, limit = search
+        queryset = fuzzy_queryset(name, limit) if fuzzy else None
+        if queryset is not None:
+            ingredients = [ingredient async for ingredient in queryset]
+        else:
+            ingredients = await sync_to_async(ingredient_index.search)(name)
+            ingredients = ingredients[:limit]
+        return Response(
+            await serializer_data(self.get_serializer(ingredients, many=True))
+        )
 
-        TODO: `exclude` in queryset.
+    def get_search_params(self):
+        """Получает параметры поиска ингредиентов из запроса.
+
+        Returns:
+            tuple | None: Название для поиска, признак нечёткого поиска
+            и ограничение количества. None, если название не передано.
         """
         name = self.request.query_params.get(conf.SEARCH_ING_NAME)
-        queryset = self.queryset
-        if name:
-            if name[0] == '%':
-                name = unquote(name)
-            else:
-                name = name.translate(incorrect_layout)
-            name = name.lower()
-            stw_queryset = list(queryset.filter(name__startswith=name))
-            cnt_queryset = queryset.filter(name__contains=name)
-            stw_queryset.extend(
-                [i for i in cnt_queryset if i not in stw_queryset]
+        if not name:
+            return None
+        if name[0] == '%':
+            name = unquote(name)
+        else:
+            name = name.translate(incorrect_layout)
+        name = name.lower()
+        mode = self.request.query_params.get(conf.SEARCH_ING_MODE)
+        if mode == conf.SEARCH_ING_FUZZY:
+            return name, True, get_search_limit(
+                self.request, conf.SEARCH_ING_FUZZY_LIMIT
             )
-            queryset = stw_queryset
-        return queryset
+        return name, False, get_search_limit(self.request)
 
 
-class RecipeViewSet(ModelViewSet, AddDelViewMixin):
+class RecipeViewSet(ConditionalGetMixin, AsyncReadMixin, ModelViewSet,
+                    AddDelViewMixin):
     """Работает с рецептами.
 
     Вывод, создание, редактирование, добавление/удаление
     в избранное и список покупок.
+    Список и рецепт поддерживают условные запросы (ETag, Last-Modified).
     Отправка текстового файла со списком покупок.
+    Выгрузка всех рецептов в NDJSON для персонала.
     Для авторизованных пользователей — возможность добавить
     рецепт в избранное и в список покупок.
     Изменять рецепт может только автор или админы.
@@ -140,44 +213,31 @@ class RecipeViewSet(ModelViewSet, AddDelViewMixin):
     queryset = Recipe.objects.select_related('author')
     serializer_class = RecipeSerializer
     permission_classes = (AuthorStaffOrReadOnly,)
-    pagination_class = PageLimitPagination
+    pagination_class = RecipePagination
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = RecipeFilter
     add_serializer = ShortRecipeSerializer
 
     def get_queryset(self):
-        """Получает queryset в соответствии с параметрами запроса.
+        """Получает queryset рецептов для текущего пользователя.
+
+        Фильтрация по параметрам запроса выполняется в `RecipeFilter`.
+        Флаги `is_favorited` и `is_in_shopping_cart` добавляются
+        аннотациями, чтобы сериализатор не делал запросов на каждый рецепт.
+        Тэги и ингредиенты предзагружает `RecipeSerializer`
+        только для рецептов, которых нет в кэше.
 
         Returns:
             QuerySet: Список запрошенных объектов.
         """
-        queryset = self.queryset
-
-        tags = self.request.query_params.getlist(conf.TAGS)
-        if tags:
-            queryset = queryset.filter(
-                tags__slug__in=tags).distinct()
-
-        author = self.request.query_params.get(conf.AUTHOR)
-        if author:
-            queryset = queryset.filter(author=author)
-
-        # Следующие фильтры только для авторизованного пользователя
         user = self.request.user
-        if user.is_anonymous:
-            return queryset
-
-        is_in_shopping = self.request.query_params.get(conf.SHOP_CART)
-        if is_in_shopping in conf.SYMBOL_TRUE_SEARCH:
-            queryset = queryset.filter(cart=user.id)
-        elif is_in_shopping in conf.SYMBOL_FALSE_SEARCH:
-            queryset = queryset.exclude(cart=user.id)
+        return recipe_annotate_user_flags(self.queryset, user)
 
-        is_favorited = self.request.query_params.get(conf.FAVORITE)
-        if is_favorited in conf.SYMBOL_TRUE_SEARCH:
-            queryset = queryset.filter(favorite=user.id)
-        if is_favorited in conf.SYMBOL_FALSE_SEARCH:
-            queryset = queryset.exclude(favorite=user.id)
-
-        return queryset
+    def get_etag_extra(self, request):
+        """Порядок популярных рецептов меняется вместе со счётчиками."""
+        if request.query_params.get(conf.ORDERING) == conf.ORDERING_POPULAR:
+            return str(popularity_stamp())
+        return ''
 
     @action(methods=conf.ACTION_METHODS, detail=True)
     def favorite(self, request, pk):
@@ -211,44 +271,112 @@ class RecipeViewSet(ModelViewSet, AddDelViewMixin):
         """
         return self.add_del_obj(pk, conf.SHOP_CART_M2M)
 
-    @action(methods=('get',), detail=False)
+    @action(
+        methods=('post', 'delete'),
+        detail=False,
+        url_path='favorite/batch',
+    )
+    def favorite_batch(self, request):
+        """Добавляет/удалет рецепты в `избранное` списком.
+
+        Вызов метода через url: */recipe/favorite/batch/.
+
+        Args:
+            request (Request): Запрос с `{"ids": [...]}`.
+
+        Returns:
+            Responce: id добавленных (удалённых) рецептов.
+        """
+        return self.add_del_batch(conf.FAVORITE_M2M)
+
+    @action(
+        methods=('post', 'delete'),
+        detail=False,
+        url_path='shopping_cart/batch',
+    )
+    def shopping_cart_batch(self, request):
+        """Добавляет/удалет рецепты в `список покупок` списком.
+
+        Вызов метода через url: */recipe/shopping_cart/batch/.
+
+        Args:
+            request (Request): Запрос с `{"ids": [...]}`.
+
+        Returns:
+            Responce: id добавленных (удалённых) рецептов.
+        """
+        return self.add_del_batch(conf.SHOP_CART_M2M)
+
+    @action(
+        methods=('get',),
+        detail=False,
+        permission_classes=(IsAdminUser,),
+    )
+    def export(self, request):
+        """Выгружает все рецепты в формате NDJSON.
+
+        Доступно только персоналу. Рецепты отдаются потоком,
+        с параметром `gzip` - сжатыми в gzip.
+        Вызов метода через url:  */recipe/export/.
+
+        Args:
+            request (Request): Запрос.
+
+        Returns:
+            StreamingHttpResponse: Ответ с файлом.
+        """
+        stream = ndjson_lines(export_recipes())
+        filename = 'recipes.ndjson'
+        content_type = 'application/x-ndjson'
+        if conf.EXPORT_GZIP in request.query_params:
+            stream = gzip_stream(stream)
+            filename += '.gz'
+            content_type = 'application/gzip'
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
+
+    @action(
+        methods=('get',),
+        detail=False,
+        renderer_classes=SHOPPING_LIST_RENDERERS,
+    )
     def download_shopping_cart(self, request):
-        """Загружает файл *.txt со списком покупок.
+        """Загружает файл со списком покупок.
 
-        Считает сумму ингредиентов в рецептах выбранных для покупки.
-        Возвращает текстовый файл со списком ингредиентов.
-        Вызов метода через url:  */recipe/<int:id>/download_shopping_cart/.
+        Суммы ингредиентов в рецептах выбранных для покупки берутся
+        из поддерживаемой таблицы CartAmountIngredient.
+        Возвращает файл со списком ингредиентов в формате,
+        указанном параметром `format`: `txt` (по умолчанию), `csv`, `pdf`.
+        Файл отдаётся потоком по мере чтения строк из базы данных.
+        Вызов метода через url:  */recipe/download_shopping_cart/.
 
         Args:
-            request (Request): Не используется.
+            request (Request): Запрос с выбранным рендерером.
 
         Returns:
-            Responce: Ответ с текстовым файлом.
+            StreamingHttpResponse: Ответ с файлом.
         """
         user = self.request.user
+        if user.is_anonymous:
+            return Response(status=HTTP_401_UNAUTHORIZED)
         if not user.carts.exists():
             return Response(status=HTTP_400_BAD_REQUEST)
-        ingredients = AmountIngredient.objects.filter(
-            recipe__in=(user.carts.values('id'))
+        ingredients = Ingredient.objects.filter(
+            cart_amounts__user=user
         ).values(
-            ingredient=F('ingredients__name'),
-            measure=F('ingredients__measurement_unit')
-        ).annotate(amount=Sum('amount'))
-
-        filename = f'{user.username}_shopping_list.txt'
-        shopping_list = (
-            f'Список покупок для:\n\n{user.first_name}\n\n'
-            f'{dt.now().strftime(conf.DATE_TIME_FORMAT)}\n\n'
+            ingredient=F('name'),
+            measure=F('measurement_unit'),
+            amount=F('cart_amounts__amount'),
+        ).order_by('ingredient', 'measure')
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(user, ingredients.iterator()),
+            content_type=renderer.content_type,
         )
-        for ing in ingredients:
-            shopping_list += (
-                f'{ing["ingredient"]}: {ing["amount"]} {ing["measure"]}\n'
-            )
-
-        shopping_list += '\n\nПосчитано в Foodgram'
-
-        response = HttpResponse(
-            shopping_list, content_type='text.txt; charset=utf-8'
+        response['Content-Disposition'] = (
+            f'attachment; filename={renderer.get_filename(user)}'
         )
-        response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
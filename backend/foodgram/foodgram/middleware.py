@@ -0,0 +1,80 @@
+"""Middleware проекта `foodgram`."""
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .routers import ReadState, read_state, replica_enabled
+
+# HTTP-методы, для которых чтение допускается из реплики
+REPLICA_SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Cookie, с которой запросы клиента после записи читают из `default`
+PRIMARY_READS_COOKIE = 'primary_reads'
+
+
+def request_read_state(request):
+    """Состояние маршрутизации чтения для запроса.
+
+    Args:
+        request (HttpRequest): Текущий запрос.
+
+    Returns:
+        ReadState: Чтение из реплики разрешено для безопасного метода
+        без cookie `PRIMARY_READS_COOKIE`.
+    """
+    return ReadState(
+        request.method in REPLICA_SAFE_METHODS
+        and PRIMARY_READS_COOKIE not in request.COOKIES
+    )
+
+
+def set_primary_reads(state, response):
+    """Ставит cookie чтения из `default`, если в запросе была запись.
+
+    Пока реплика догоняет основную базу, следующие запросы клиента
+    (`settings.REPLICA_STICKY_SECONDS` секунд) видят его изменения.
+
+    Args:
+        state (ReadState): Состояние маршрутизации запроса.
+        response (HttpResponse): Ответ.
+    """
+    if state.wrote and replica_enabled():
+        response.set_cookie(
+            PRIMARY_READS_COOKIE,
+            '1',
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    """Включает чтение из реплики для запросов с безопасным методом.
+
+    Состояние хранится в `ContextVar` и сбрасывается после ответа.
+    Потоковые ответы, отдаваемые после выхода из middleware,
+    читают из `default`.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state = request_read_state(request)
+            token = read_state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                read_state.reset(token)
+            set_primary_reads(state, response)
+            return response
+    else:
+        def middleware(request):
+            state = request_read_state(request)
+            token = read_state.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                read_state.reset(token)
+            set_primary_reads(state, response)
+            return response
+    return middleware
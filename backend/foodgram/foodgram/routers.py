@@ -0,0 +1,121 @@
+"""Маршрутизация запросов ORM между основной базой и репликой.
+
+Чтение уходит в базу `replica` (если она есть в `DATABASES`) только
+внутри запроса с безопасным HTTP-методом - режим включает
+`foodgram.middleware.replica_middleware`. Запись всегда идёт
+в `default`. После первой записи, а также внутри транзакции
+основной базы, чтение до конца запроса выполняется из `default`,
+чтобы видеть собственные изменения. Следующие запросы клиента
+после записи также читают из `default` в течение
+`REPLICA_STICKY_SECONDS` (cookie middleware).
+
+Данные для общих кэшей (представления рецептов, справочники)
+читаются из `default` внутри `read_primary()`: отставшие данные
+реплики иначе остались бы в кэше и после того, как она догонит.
+
+Вне запросов (команды, потоки обработки изображений, shell)
+всё чтение идёт в `default`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+
+
+class ReadState:
+    """Состояние маршрутизации чтения в рамках одного запроса.
+
+    Attributes:
+        use_replica (bool): Чтение разрешено из реплики.
+        primary_reads (int): Глубина вложенности `read_primary()`.
+        wrote (bool): В запросе была запись.
+    """
+    __slots__ = ('use_replica', 'primary_reads', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.primary_reads = 0
+        self.wrote = False
+
+
+read_state = ContextVar('read_state', default=None)
+
+
+def replica_enabled():
+    """Настроена ли база-реплика.
+
+    Returns:
+        bool: True, если в `DATABASES` есть `replica`.
+    """
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def pin_primary():
+    """Переключает чтение до конца текущего запроса на `default`."""
+    state = read_state.get()
+    if state is not None:
+        state.use_replica = False
+
+
+def replica_reads():
+    """Пойдёт ли следующее чтение ORM в реплику.
+
+    Returns:
+        bool: True, если чтение сейчас выполняется из `replica`.
+    """
+    state = read_state.get()
+    if (
+        state is None
+        or not state.use_replica
+        or state.primary_reads
+        or not replica_enabled()
+    ):
+        return False
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        state.use_replica = False
+        return False
+    return True
+
+
+@contextmanager
+def read_primary():
+    """Выполняет чтение внутри блока из `default`.
+
+    Example:
+        with read_primary():
+            ingredients = list(Ingredient.objects.all())
+    """
+    state = read_state.get()
+    if state is None:
+        yield
+        return
+    state.primary_reads += 1
+    try:
+        yield
+    finally:
+        state.primary_reads -= 1
+
+
+class ReplicaRouter:
+    """Роутер, отправляющий безопасное чтение в реплику."""
+
+    def db_for_read(self, model, **hints):
+        if replica_reads():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = read_state.get()
+        if state is not None:
+            state.use_replica = False
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
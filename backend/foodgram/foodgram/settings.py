@@ -47,12 +47,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
     'users.apps.UsersConfig',
     'rest_framework.authtoken',
     'rest_framework',
     'djoser',
+    'django_filters',
     'colorfield',
     'corsheaders',
     'import_export',
@@ -60,6 +62,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.middleware.replica_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -109,6 +112,45 @@ DATABASES = {
     }
 }
 
+# Read replica (optional): GET/HEAD/OPTIONS requests read from it,
+# see foodgram/routers.py. Unset values are taken from `default`.
+# Example for local SQLite: REPLICA_DB_NAME=/tmp/foodgram_replica.sqlite3
+if env('REPLICA_DB_HOST', default='') or env('REPLICA_DB_NAME', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': env('REPLICA_DB_NAME', default=DATABASES['default']['NAME']),
+        'USER': env('REPLICA_DB_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': env(
+            'REPLICA_DB_PASSWORD', default=DATABASES['default']['PASSWORD']
+        ),
+        'HOST': env('REPLICA_DB_HOST', default=DATABASES['default']['HOST']),
+        'PORT': env('REPLICA_DB_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+
+# After a write, the client's requests read from `default` for this many
+# seconds (cookie set by foodgram.middleware.replica_middleware)
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=5)
+
+# Async read views for recipes, tags and ingredients (api/async_views.py).
+# Enable when serving foodgram.asgi with an ASGI server (uvicorn, daphne)
+ASYNC_READ_VIEWS = env.bool('ASYNC_READ_VIEWS', default=False)
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Examples: filecache:///var/tmp/foodgram_cache, dbcache://foodgram_cache
+# The cache must be shared by all processes (workers, management commands).
+# locmemcache:// is visible to one process only: the recipe cache, ETags
+# and the shared token cache are bypassed with it unless
+# CACHE_SINGLE_PROCESS=True (tests, runserver)
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+CACHE_SINGLE_PROCESS = env.bool('CACHE_SINGLE_PROCESS', default=False)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -150,7 +192,7 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES':
-    ['rest_framework.authentication.TokenAuthentication', ],
+    ['api.authentication.CachedTokenAuthentication', ],
 
     'DEFAULT_PERMISSION_CLASSES':
     ['rest_framework.permissions.IsAuthenticatedOrReadOnly', ],
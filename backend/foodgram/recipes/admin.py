@@ -1,3 +1,4 @@
+from api.images import variant_urls
 from django.contrib.admin import ModelAdmin, TabularInline, register, site
 from django.utils.safestring import mark_safe
 from import_export.admin import ImportExportModelAdmin
@@ -66,7 +67,10 @@ class RecipeAdmin(ModelAdmin):
     empty_value_display = EMPTY_VALUE_DISPLAY
 
     def get_image(self, obj):
-        return mark_safe(f'<img src={obj.image.url} width="80" hieght="30"')
+        thumb = variant_urls(obj).get('thumb', {}).get('jpeg')
+        return mark_safe(
+            f'<img src={thumb or obj.image.url} width="80" hieght="30"'
+        )
 
     get_image.short_description = 'Изображение'
 
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:45
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AmountIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1, 'Нужно хоть какое-то количество.'), django.core.validators.MaxValueValidator(10000, 'Слишком много!')], verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Ингридиент',
+                'verbose_name_plural': 'Количество ингридиентов',
+                'ordering': ('recipe',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Ингридиент')),
+                ('measurement_unit', models.CharField(max_length=200, verbose_name='Единицы измерения')),
+            ],
+            options={
+                'verbose_name': 'Ингридиент',
+                'verbose_name_plural': 'Ингридиенты',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Recipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Название блюда')),
+                ('pub_date', models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации')),
+                ('image', models.ImageField(upload_to='recipe/images/', verbose_name='Изображение блюда')),
+                ('text', models.TextField(max_length=5000, verbose_name='Описание блюда')),
+                ('cooking_time', models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MinValueValidator(1, 'Ваше блюдо уже готово!'), django.core.validators.MaxValueValidator(600, 'Очень долго ждать...')], verbose_name='Время приготовления')),
+            ],
+            options={
+                'verbose_name': 'Рецепт',
+                'verbose_name_plural': 'Рецепты',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Тэг')),
+                ('color', models.CharField(blank=True, default='FF', max_length=6, null=True, verbose_name='Цветовой HEX-код')),
+                ('slug', models.CharField(max_length=200, unique=True, verbose_name='Слаг тэга')),
+            ],
+            options={
+                'verbose_name': 'Тэг',
+                'verbose_name_plural': 'Тэги',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.CheckConstraint(check=models.Q(('name__length__gt', 0)), name='\nrecipes_tag_name is empty\n'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.CheckConstraint(check=models.Q(('color__length__gt', 0)), name='\nrecipes_tag_color is empty\n'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.CheckConstraint(check=models.Q(('slug__length__gt', 0)), name='\nrecipes_tag_slug is empty\n'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:45
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=api.storage.ContentAddressedStorage(), upload_to='recipe/images/', verbose_name='Изображение блюда'),
+        ),
+    ]
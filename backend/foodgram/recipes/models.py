@@ -12,13 +12,18 @@ Models:
     AmountIngredient:
         Модель для связи Ingredient и Recipe.
         Также указывает количество ингридиента.
+    CartAmountIngredient:
+        Суммарное количество ингредиента во всех рецептах
+        из списка покупок пользователя.
 """
 from api.conf import MAX_LEN_RECIPES_CHARFIELD, MAX_LEN_RECIPES_TEXTFIELD
+from api.storage import ContentAddressedStorage
 
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db.models import (CASCADE, CharField, CheckConstraint,
                               DateTimeField, ForeignKey, ImageField,
-                              ManyToManyField, Model,
+                              Index, IntegerField, JSONField, ManyToManyField,
+                              Model, PositiveIntegerField,
                               PositiveSmallIntegerField, Q, TextField,
                               UniqueConstraint)
 from django.db.models.functions import Length
@@ -157,8 +162,19 @@ class Recipe(Model):
             Создаётся при добавлении пользователем рецепта в `покупки`.
         pub_date(datetime):
             Дата добавления рецепта. Прописывается автоматически.
+        updated_at(datetime):
+            Дата последнего изменения рецепта или связанных с ним
+            тэгов, ингредиентов и автора. Прописывается автоматически.
         image(str):
             Изображение рецепта. Указывает путь к изображению.
+            Файлы именуются по хешу содержимого (`api.storage`).
+        image_variants(dict):
+            Уменьшенные копии изображения (`api.images`).
+            Заполняется после обработки загруженного изображения.
+        favorites_count(int):
+            Количество добавлений рецепта в `избранное`.
+        in_carts_count(int):
+            Количество добавлений рецепта в `покупки`.
         text(str):
             Описание рецепта. Установлены ограничения по длине.
         cooking_time(int):
@@ -200,9 +216,31 @@ class Recipe(Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
     image = ImageField(
         verbose_name='Изображение блюда',
         upload_to='recipe/images/',
+        storage=ContentAddressedStorage(),
+    )
+    image_variants = JSONField(
+        verbose_name='Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    favorites_count = PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
     )
     text = TextField(
         verbose_name='Описание блюда',
@@ -227,6 +265,12 @@ class Recipe(Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date', )
+        indexes = (
+            Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_popular_idx',
+            ),
+        )
         constraints = (
             UniqueConstraint(
                 fields=('name', 'author'),
@@ -294,3 +338,50 @@ class AmountIngredient(Model):
 
     def __str__(self) -> str:
         return f'{self.amount} {self.ingredients}'
+
+
+class CartAmountIngredient(Model):
+    """Количество ингредиента в списке покупок пользователя.
+
+    Хранит сумму `AmountIngredient.amount` по всем рецептам из списка
+    покупок пользователя. Обновляется на разницу (delta) при изменении
+    списка покупок и ингредиентов рецептов, проверяется и пересчитывается
+    командой `cart_totals`.
+
+    Attributes:
+        user(int):
+            Владелец списка покупок. Связь через ForeignKey.
+        ingredient(int):
+            Ингредиент. Связь через ForeignKey.
+        amount(int):
+            Суммарное количество ингредиента.
+    """
+    user = ForeignKey(
+        verbose_name='Пользователь',
+        related_name='cart_ingredients',
+        to=User,
+        on_delete=CASCADE,
+    )
+    ingredient = ForeignKey(
+        verbose_name='Ингредиент',
+        related_name='cart_amounts',
+        to=Ingredient,
+        on_delete=CASCADE,
+    )
+    amount = IntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+        constraints = (
+            UniqueConstraint(
+                fields=('user', 'ingredient', ),
+                name='unique_cart_ingredient',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user}: {self.amount} {self.ingredient}'
@@ -8,7 +8,7 @@ from api import conf
 
 from django.contrib.auth.models import AbstractUser
 from django.db.models import (CharField, CheckConstraint, EmailField,
-                              ManyToManyField, Q)
+                              ManyToManyField, PositiveIntegerField, Q)
 from django.db.models.functions import Length
 
 from .validators import MinLenValidator, OneOfTwoValidator
@@ -44,6 +44,8 @@ class User(AbstractUser):
             Установлено ограничение по максимальной длине.
         subscribe(int):
             Ссылки на id связанных пользователей.
+        subscribers_count(int):
+            Количество подписчиков пользователя.
     """
 
     email = EmailField(
@@ -78,6 +80,11 @@ class User(AbstractUser):
         to='self',
         symmetrical=False,
     )
+    subscribers_count = PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пользователь'